@@ -0,0 +1,87 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import KEY_PREFIX, bump_key_version, get_key_version
+
+
+def user_version_key(user_id):
+    return f'{KEY_PREFIX}:user:{user_id}'
+
+
+def bump_user_version(user_id):
+    """Сбрасывает кэш пользователя после COMMIT текущей транзакции.
+
+    Повышенная до COMMIT версия дала бы параллельному запросу прочитать
+    и закэшировать под новой версией ещё старую строку пользователя.
+    """
+    transaction.on_commit(
+        lambda: bump_key_version(user_version_key(user_id))
+    )
+
+
+class TTLCache:
+    """Ограниченный LRU-кэш процесса с временем жизни записей."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = (value, time.monotonic() + self.ttl)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+user_cache = TTLCache(
+    settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication без чтения строки пользователя на каждый запрос.
+
+    Пользователь хранится в кэше процесса под ключом (id, версия). Версия
+    лежит в общем кэше Django и повышается сигналами при сохранении или
+    удалении пользователя, так что смена роли или is_active видна сразу,
+    а устаревшие записи вытесняются по LRU и TTL. Неактивные и удалённые
+    пользователи не кэшируются: их отсеивает родительский get_user.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        key = (user_id, get_key_version(user_version_key(user_id)))
+        user = user_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(key, user)
+        # Запрос может менять request.user, общий объект не отдаём.
+        return copy.copy(user)
@@ -0,0 +1,246 @@
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import prefetch_related_objects
+from django.utils.encoding import smart_str
+from rest_framework import serializers, status
+from rest_framework.relations import ManyRelatedField
+from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
+
+BATCH_OBJECTS = 'batch_objects'
+
+
+class BatchSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, который в пакетном запросе не ходит в БД.
+
+    Объекты для всех слагов пакета загружаются заранее одним запросом
+    на поле и передаются через контекст сериализатора.
+    """
+
+    def batch_key(self):
+        return self.get_queryset().model, self.slug_field
+
+    def to_internal_value(self, data):
+        objects = self.context.get(BATCH_OBJECTS)
+        if objects is None:
+            return super().to_internal_value(data)
+        try:
+            return objects[self.batch_key()][smart_str(data)]
+        except KeyError:
+            self.fail(
+                'does_not_exist', slug_name=self.slug_field,
+                value=smart_str(data),
+            )
+
+
+def batch_slug_fields(serializer):
+    for name, field in serializer.fields.items():
+        if field.read_only:
+            continue
+        if isinstance(field, ManyRelatedField):
+            field = field.child_relation
+        if isinstance(field, BatchSlugRelatedField):
+            yield name, field
+
+
+def resolve_slugs(serializer, items):
+    """Загружает объекты всех слагов пакета: один запрос на поле."""
+    objects = {}
+    for name, field in batch_slug_fields(serializer):
+        slugs = set()
+        for item in items:
+            value = item.get(name) if isinstance(item, dict) else None
+            values = value if isinstance(value, list) else [value]
+            slugs.update(
+                smart_str(slug) for slug in values
+                if isinstance(slug, (str, int))
+            )
+        found = objects.setdefault(field.batch_key(), {})
+        found.update(
+            (smart_str(getattr(obj, field.slug_field)), obj)
+            for obj in field.get_queryset().filter(
+                **{f'{field.slug_field}__in': slugs}
+            )
+        )
+    return objects
+
+
+def saves_one_by_one():
+    """Сохраняет ли bulk_insert объекты по одному, с сигналами post_save."""
+    return not connection.features.can_return_ids_from_bulk_insert
+
+
+def bulk_insert(model, rows):
+    """Вставляет объекты и их связи many-to-many пачками.
+
+    Первичные ключи после bulk_create известны только на СУБД, которые
+    умеют возвращать их из INSERT (PostgreSQL). На остальных объекты
+    сохраняются по одному внутри той же транзакции, и для них уже
+    отправлены сигналы post_save (см. saves_one_by_one).
+    """
+    m2m_fields = [
+        field for field in model._meta.many_to_many
+        if any(field.name in row for row in rows)
+    ]
+    m2m_names = {field.name for field in m2m_fields}
+    objects = [
+        model(**{
+            name: value for name, value in row.items()
+            if name not in m2m_names
+        })
+        for row in rows
+    ]
+    if saves_one_by_one():
+        for obj in objects:
+            obj.save()
+    else:
+        model.objects.bulk_create(objects)
+    for field in m2m_fields:
+        through = field.remote_field.through
+        source = f'{field.m2m_field_name()}_id'
+        target = f'{field.m2m_reverse_field_name()}_id'
+        through.objects.bulk_create(
+            through(**{source: obj.pk, target: related.pk})
+            for obj, row in zip(objects, rows)
+            for related in row.get(field.name, ())
+        )
+    if m2m_names:
+        prefetch_related_objects(objects, *m2m_names)
+    return objects
+
+
+class BatchCreateMixin:
+    """Пакетное создание: POST со списком объектов вместо одного объекта.
+
+    Все элементы проверяются за один проход: слаги связанных объектов
+    и уникальные поля из batch_unique_fields сверяются с БД одним запросом
+    на поле. Корректные элементы вставляются одной транзакцией через
+    bulk_create. В ответе по элементу на каждый элемент запроса: status и
+    data для созданных или errors для отклонённых. Код ответа 201, если
+    созданы все элементы, 207 при частичном успехе и 400, если не создан
+    ни один.
+    """
+    batch_unique_fields = ()
+    batch_permission_classes = None
+    batch_serializer_class = None
+
+    @property
+    def is_batch(self):
+        return (
+            self.action == 'create' and isinstance(self.request.data, list)
+        )
+
+    def get_permissions(self):
+        if self.batch_permission_classes is not None and self.is_batch:
+            return [permission() for permission in
+                    self.batch_permission_classes]
+        return super().get_permissions()
+
+    def get_serializer_class(self):
+        if self.batch_serializer_class is not None and self.is_batch:
+            return self.batch_serializer_class
+        return super().get_serializer_class()
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        items = request.data
+        if not 0 < len(items) <= settings.BATCH_CREATE_MAX_ITEMS:
+            return Response(
+                {'detail': 'В пакете должно быть от 1 до '
+                           f'{settings.BATCH_CREATE_MAX_ITEMS} элементов.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        batch, errors = self.validate_items(items)
+        valid = [batch[index] for index in range(len(batch))
+                 if index not in errors]
+        if valid:
+            try:
+                self.perform_batch_create(valid)
+            except IntegrityError:
+                return Response(
+                    {'detail': 'Пакет конфликтует с параллельно созданными '
+                               'объектами, повторите запрос.'},
+                    status=status.HTTP_409_CONFLICT,
+                )
+        return self.batch_response(batch, errors)
+
+    def validate_items(self, items):
+        """Проверяет элементы пакета; возвращает сериализаторы и ошибки."""
+        context = self.get_serializer_context()
+        context[BATCH_OBJECTS] = resolve_slugs(
+            self.get_serializer(), items
+        )
+        batch = [self.get_serializer(data=item, context=context)
+                 for item in items]
+        errors = {}
+        for index, serializer in enumerate(batch):
+            for name in self.batch_unique_fields:
+                field = serializer.fields[name]
+                field.validators = [
+                    validator for validator in field.validators
+                    if not isinstance(validator, UniqueValidator)
+                ]
+            if not serializer.is_valid():
+                errors[index] = serializer.errors
+        errors.update(self.validate_batch({
+            index: serializer.validated_data
+            for index, serializer in enumerate(batch)
+            if index not in errors
+        }))
+        return batch, errors
+
+    def validate_batch(self, rows):
+        """Проверки, которым нужен весь пакет; возвращает ошибки по индексу.
+
+        По умолчанию проверяет уникальность batch_unique_fields среди
+        элементов пакета и в БД, одним запросом на поле.
+        """
+        errors = {}
+        model = self.get_serializer().Meta.model
+        for name in self.batch_unique_fields:
+            values = [row[name] for row in rows.values() if name in row]
+            taken = set(model.objects.filter(
+                **{f'{name}__in': values}
+            ).values_list(name, flat=True))
+            for index, row in rows.items():
+                if name not in row or index in errors:
+                    continue
+                if row[name] in taken:
+                    errors[index] = {name: [UniqueValidator.message]}
+                taken.add(row[name])
+        return errors
+
+    def get_batch_save_kwargs(self):
+        """Поля, общие для всех объектов пакета (как kwargs у save())."""
+        return {}
+
+    def perform_batch_create(self, batch):
+        extra = self.get_batch_save_kwargs()
+        model = batch[0].Meta.model
+        with transaction.atomic():
+            objects = bulk_insert(model, [
+                {**serializer.validated_data, **extra}
+                for serializer in batch
+            ])
+            for serializer, obj in zip(batch, objects):
+                serializer.instance = obj
+            self.batch_created(objects)
+
+    def batch_created(self, objects):
+        """Замена сигналов post_save, которые bulk_create не отправляет."""
+
+    def batch_response(self, batch, errors):
+        results = [
+            {'status': status.HTTP_400_BAD_REQUEST, 'errors': errors[index]}
+            if index in errors else
+            {'status': status.HTTP_201_CREATED, 'data': serializer.data}
+            for index, serializer in enumerate(batch)
+        ]
+        if not errors:
+            code = status.HTTP_201_CREATED
+        elif len(errors) == len(batch):
+            code = status.HTTP_400_BAD_REQUEST
+        else:
+            code = status.HTTP_207_MULTI_STATUS
+        return Response(results, status=code)
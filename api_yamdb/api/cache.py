@@ -0,0 +1,134 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from api_yamdb.db.router import may_read_stale, note_write
+
+KEY_PREFIX = 'response_cache'
+HITS_KEY = f'{KEY_PREFIX}:hits'
+MISSES_KEY = f'{KEY_PREFIX}:misses'
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def version_key(model):
+    return f'{KEY_PREFIX}:version:{model._meta.label_lower}'
+
+
+def get_key_version(key):
+    """Текущее значение счётчика версии по ключу кэша.
+
+    Если ключ вытеснен, он заводится заново со значением от часов,
+    а не с единицы, чтобы не совпасть со старыми записями.
+    """
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_key_version(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def get_version(model):
+    return get_key_version(version_key(model))
+
+
+def bump_version(model):
+    """Повышает версию модели после фиксации текущей транзакции.
+
+    Повышение до COMMIT не защищает от устаревших записей: запрос,
+    прочитавший старые строки между повышением и фиксацией, сохранил бы
+    их под новой версией. Вне транзакции версия повышается сразу.
+    Запись отмечается и для роутера реплик: пока они догоняют, ответы
+    с реплик не кэшируются.
+    """
+    def bump():
+        bump_key_version(version_key(model))
+        note_write()
+
+    transaction.on_commit(bump)
+
+
+def incr_counter(key, delta=1):
+    cache = get_cache()
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, delta, timeout=None)
+
+
+def get_counter_stats(hits_key, misses_key):
+    counters = get_cache().get_many((hits_key, misses_key))
+    hits = counters.get(hits_key, 0)
+    misses = counters.get(misses_key, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else None,
+    }
+
+
+def get_stats():
+    return get_counter_stats(HITS_KEY, MISSES_KEY)
+
+
+class ResponseCacheMixin:
+    """Кэширует данные ответов list/retrieve для безопасных запросов.
+
+    Ключ включает полный адрес с query string (а значит фильтры и страницу)
+    и версии всех моделей из cache_models. Сигналы сохранения и удаления
+    повышают версии, поэтому запись сразу перестаёт находиться в кэше,
+    а TIMEOUT служит лишь страховкой. Кэшируется response.data, так что
+    согласование формата ответа продолжает работать.
+    """
+    cache_models = ()
+
+    def get_cache_key(self, request):
+        versions = ':'.join(
+            str(get_version(model)) for model in self.cache_models
+        )
+        # Ссылки пагинации абсолютные: схема и Host входят в ключ, иначе
+        # один запрос с подложным Host испортил бы их всем клиентам.
+        url = hashlib.md5(
+            request.build_absolute_uri().encode('utf-8')
+        ).hexdigest()
+        return f'{KEY_PREFIX}:{self.basename}:{self.action}:{versions}:{url}'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            incr_counter(HITS_KEY)
+            return Response(data, headers={'X-Cache': 'HIT'})
+        incr_counter(MISSES_KEY)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and not may_read_stale():
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class RetrieveResponseCacheMixin(ResponseCacheMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
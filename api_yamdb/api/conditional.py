@@ -0,0 +1,84 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_version
+
+
+class ConditionalGetMixin:
+    """ETag для list/retrieve без построения тела ответа.
+
+    ETag списка собирается из версий модели списка и моделей etag_models
+    (их повышают сигналы записи, читаются они из кэша без запросов к БД)
+    и из строки родителя, которую список всё равно загружает. Агрегаты
+    по всей выборке не считаются: удаление строки тоже повышает версию,
+    а Last-Modified у списка нет. ETag объекта - дата изменения его
+    строки и версии etag_models; Last-Modified отдаётся, только если
+    представление зависит от одной этой строки. Путь с query string
+    входит в ETag, так как от него зависит страница.
+    """
+    modified_field = 'updated'
+    # Модели вложенных представлений, не меняющие дату изменения строки.
+    etag_models = ()
+
+    def get_versions(self, models):
+        return [get_version(model) for model in models]
+
+    def get_parent_validators(self):
+        """Поля строки родителя из URL, от которых зависит список."""
+        return []
+
+    def get_list_validators(self):
+        model = self.get_queryset().model
+        return None, (
+            self.get_versions((model,) + self.etag_models)
+            + self.get_parent_validators()
+        )
+
+    def get_object_validators(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        modified = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).values_list(self.modified_field, flat=True).first()
+        if modified is None:
+            return None, None
+        last_modified = None if self.etag_models else modified
+        return last_modified, (
+            [modified.isoformat()] + self.get_versions(self.etag_models)
+        )
+
+    def conditional_response(self, handler, validators, request, *args,
+                             **kwargs):
+        last_modified, parts = validators()
+        if parts is None:
+            return handler(request, *args, **kwargs)
+        etag = quote_etag(hashlib.md5(
+            ':'.join(map(str, [request.get_full_path()] + parts))
+            .encode('utf-8')
+        ).hexdigest())
+        timestamp = (
+            int(last_modified.timestamp()) if last_modified else None
+        )
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if not_modified is not None:
+            return not_modified
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, self.get_list_validators, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, self.get_object_validators,
+            request, *args, **kwargs
+        )
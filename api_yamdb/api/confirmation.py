@@ -0,0 +1,83 @@
+import hmac
+import secrets
+import string
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from reviews.models import CONFIRMATION_CODE_LENGTH
+
+KEY_PREFIX = 'confirmation'
+
+
+def make_code():
+    return ''.join(
+        secrets.choice(string.digits) for _ in range(CONFIRMATION_CODE_LENGTH)
+    )
+
+
+class BaseCodeStore(ABC):
+    """Хранилище одноразовых кодов подтверждения.
+
+    issue выдаёт пользователю новый код вместо прежнего, consume
+    принимает код не больше одного раза. Неверный код сжигает выданный:
+    подобрать его перебором нельзя, нужен новый signup.
+    """
+
+    @abstractmethod
+    def issue(self, user):
+        """Выдаёт пользователю новый код и возвращает его."""
+
+    @abstractmethod
+    def consume(self, user, code):
+        """Принимает код: True, если он верен и ещё не использован."""
+
+
+class CacheCodeStore(BaseCodeStore):
+    """Коды в кэше CONFIRMATION_CODE_CACHE_ALIAS, живут CONFIRMATION_CODE_TTL.
+
+    В кэше нет атомарного «сравнить и удалить», поэтому у каждого
+    выданного кода есть случайный номер, а попытка входа не удаляет код,
+    а добавляет (cache.add) отметку об использовании этого номера. Код
+    принимается, только если отметку добавил этот запрос и код верен:
+    add атомарен в Redis и Memcached, так что два одновременных запроса
+    не получат два токена, а неверная попытка сжигает код. Код, выданный
+    новым signup во время такой попытки, получает новый номер и ею не
+    затрагивается.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.CONFIRMATION_CODE_CACHE_ALIAS]
+
+    def code_key(self, user):
+        return f'{KEY_PREFIX}:code:{user.pk}'
+
+    def used_key(self, issue_id):
+        return f'{KEY_PREFIX}:used:{issue_id}'
+
+    def issue(self, user):
+        code = make_code()
+        self.cache.set(
+            self.code_key(user),
+            (secrets.token_hex(8), code),
+            settings.CONFIRMATION_CODE_TTL,
+        )
+        return code
+
+    def consume(self, user, code):
+        issued = self.cache.get(self.code_key(user))
+        if issued is None:
+            return False
+        issue_id, expected = issued
+        if not self.cache.add(
+            self.used_key(issue_id), True, settings.CONFIRMATION_CODE_TTL
+        ):
+            return False
+        return hmac.compare_digest(expected.encode(), code.encode())
+
+
+def get_code_store():
+    return import_string(settings.CONFIRMATION_CODE_STORE)()
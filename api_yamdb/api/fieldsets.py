@@ -0,0 +1,130 @@
+import copy
+
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+SPARSE_ACTIONS = ('list', 'retrieve')
+
+
+def parse_names(value):
+    """'id, name,,year' -> frozenset({'id', 'name', 'year'})."""
+    return frozenset(filter(None, (name.strip() for name in value.split(','))))
+
+
+class SparseFieldsSerializerMixin:
+    """Сериализатор с выбором полей и раскрытием связей.
+
+    fields - имена полей для вывода (None - все поля). expand - связи из
+    expandable_fields, которые выводятся вложенными объектами вместо
+    объявленного в сериализаторе поля-идентификатора; None означает
+    default_expand, что сохраняет привычный формат ответа.
+    """
+    expandable_fields = {}
+    default_expand = ()
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        self.only_fields = fields
+        self.expand = self.default_expand if expand is None else expand
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def get_sparse_field_names(cls):
+        """Все допустимые в fields= имена, считаются раз на класс."""
+        if '_sparse_field_names' not in cls.__dict__:
+            cls._sparse_field_names = frozenset(
+                cls(expand=()).fields
+            ) | frozenset(cls.expandable_fields)
+        return cls._sparse_field_names
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.expand:
+            fields[name] = copy.deepcopy(self.expandable_fields[name])
+        if self.only_fields is not None:
+            for name in set(fields) - self.only_fields:
+                del fields[name]
+        return fields
+
+
+class SparseFieldsMixin:
+    """Параметры ?fields= и ?expand= для list и retrieve.
+
+    ?fields=id,name,year выводит только перечисленные поля, ?expand=author
+    раскрывает связи из expandable_fields сериализатора. Неизвестные имена
+    дают 400. get_queryset вьюсета спрашивает wants() и is_expanded(),
+    чтобы не делать JOIN и prefetch для невыводимых полей, а
+    defer_unrequested() убирает лишние столбцы из SELECT.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in SPARSE_ACTIONS:
+            self.validate_sparse_params()
+
+    def get_query_names(self, param):
+        if self.action not in SPARSE_ACTIONS:
+            return None
+        value = self.request.query_params.get(param)
+        return None if value is None else parse_names(value)
+
+    @cached_property
+    def sparse_fields(self):
+        return self.get_query_names(FIELDS_PARAM)
+
+    @cached_property
+    def expand(self):
+        if self.action not in SPARSE_ACTIONS:
+            return frozenset()
+        expand = self.get_query_names(EXPAND_PARAM)
+        if expand is None:
+            return frozenset(self.get_serializer_class().default_expand)
+        return expand
+
+    def validate_sparse_params(self):
+        serializer_class = self.get_serializer_class()
+        errors = {}
+        unknown = (self.sparse_fields or frozenset()) - (
+            serializer_class.get_sparse_field_names()
+        )
+        if unknown:
+            errors[FIELDS_PARAM] = [
+                f'Неизвестные поля: {", ".join(sorted(unknown))}.'
+            ]
+        unknown = self.expand - frozenset(serializer_class.expandable_fields)
+        if unknown:
+            errors[EXPAND_PARAM] = [
+                f'Нельзя раскрыть: {", ".join(sorted(unknown))}.'
+            ]
+        if errors:
+            raise ValidationError(errors)
+
+    def wants(self, name):
+        return self.sparse_fields is None or name in self.sparse_fields
+
+    def is_expanded(self, name):
+        return self.wants(name) and name in self.expand
+
+    def defer_unrequested(self, queryset):
+        """Загружает только столбцы запрошенных полей.
+
+        Столбцы курсорной сортировки остаются: по ним строится курсор.
+        """
+        if self.sparse_fields is None:
+            return queryset
+        meta = queryset.model._meta
+        columns = {field.name for field in meta.concrete_fields}
+        return queryset.only(
+            meta.pk.name,
+            *(name for name in self.sparse_fields if name in columns),
+            *(name.lstrip('-') for name in getattr(
+                self, 'cursor_ordering', ()
+            )),
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in SPARSE_ACTIONS:
+            kwargs.setdefault('fields', self.sparse_fields)
+            kwargs.setdefault('expand', self.expand)
+        return super().get_serializer(*args, **kwargs)
@@ -1,25 +1,50 @@
+from django.db.models import Count
 from django_filters import rest_framework as filters
 from reviews.models import Title
+from reviews.search import search_titles
+
+GenreTitle = Title.genre.through
+
+
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    pass
 
 
 class TitleFilter(filters.FilterSet):
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains'
-    )
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains'
-    )
+    category = filters.CharFilter(field_name='category__slug')
+    genre = CharInFilter(method='filter_genre_any')
+    genre_all = CharInFilter(method='filter_genre_all')
     name = filters.CharFilter(
         field_name='name',
         lookup_expr='icontains'
     )
-    year = filters.NumberFilter(
-        field_name='year',
-        lookup_expr='icontains'
-    )
+    year = filters.NumberFilter(field_name='year')
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
         fields = '__all__'
+        exclude = ('search_vector',)
+
+    def filter_genre_any(self, queryset, name, value):
+        """?genre=drama,comedy - произведения хотя бы с одним из жанров.
+
+        Подзапрос по промежуточной таблице вместо JOIN не даёт дублей.
+        """
+        return queryset.filter(pk__in=GenreTitle.objects.filter(
+            genre__slug__in=value
+        ).values('title_id'))
+
+    def filter_genre_all(self, queryset, name, value):
+        """?genre_all=drama,comedy - произведения со всеми жанрами сразу."""
+        slugs = set(value)
+        return queryset.filter(pk__in=GenreTitle.objects.filter(
+            genre__slug__in=slugs
+        ).values('title_id').annotate(
+            matched=Count('genre_id')
+        ).filter(matched=len(slugs)).values('title_id'))
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
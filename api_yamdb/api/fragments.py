@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import prefetch_related_objects
+from django.utils.functional import cached_property
+from rest_framework.response import Response
+
+from api_yamdb.db.router import may_read_stale
+from .cache import get_counter_stats, get_version, incr_counter
+from .fieldsets import EXPAND_PARAM, FIELDS_PARAM
+
+KEY_PREFIX = 'fragment'
+HITS_KEY = f'{KEY_PREFIX}:hits'
+MISSES_KEY = f'{KEY_PREFIX}:misses'
+
+
+def get_fragment_cache():
+    return caches[settings.FRAGMENT_CACHE_ALIAS]
+
+
+def get_stats():
+    return get_counter_stats(HITS_KEY, MISSES_KEY)
+
+
+class FragmentCacheMixin:
+    """Собирает страницы списка из закэшированных представлений объектов.
+
+    Ключ фрагмента - pk объекта, его поле fragment_version_field (дата
+    изменения строки) и версии моделей из fragment_models, от которых
+    зависит вложенное представление. Страница загружается без
+    fragment_prefetch; связи подгружаются и сериализуются только для
+    промахов. Фрагменты используются для полного представления: с
+    ?fields= или ?expand= список строится как обычно.
+    """
+    fragment_models = ()
+    fragment_prefetch = ()
+    fragment_version_field = 'updated'
+
+    @cached_property
+    def fragments_enabled(self):
+        params = self.request.query_params
+        return (
+            settings.FRAGMENT_CACHE_ENABLED
+            and self.action == 'list'
+            and FIELDS_PARAM not in params
+            and EXPAND_PARAM not in params
+        )
+
+    def get_fragment_key(self, prefix, obj):
+        version = getattr(obj, self.fragment_version_field)
+        return f'{prefix}:{obj.pk}:{version.timestamp()}'
+
+    def render_fragments(self, objects):
+        versions = ':'.join(
+            str(get_version(model)) for model in self.fragment_models
+        )
+        prefix = f'{KEY_PREFIX}:{self.basename}:{versions}'
+        keys = [self.get_fragment_key(prefix, obj) for obj in objects]
+        cache = get_fragment_cache()
+        fragments = cache.get_many(keys)
+        misses = [
+            (key, obj) for key, obj in zip(keys, objects)
+            if key not in fragments
+        ]
+        if misses:
+            missed = [obj for _, obj in misses]
+            prefetch_related_objects(missed, *self.fragment_prefetch)
+            rendered = dict(zip(
+                (key for key, _ in misses),
+                self.get_serializer(missed, many=True).data,
+            ))
+            if not may_read_stale():
+                cache.set_many(rendered)
+            fragments.update(rendered)
+        if len(misses) < len(keys):
+            incr_counter(HITS_KEY, len(keys) - len(misses))
+        if misses:
+            incr_counter(MISSES_KEY, len(misses))
+        return [fragments[key] for key in keys]
+
+    def list(self, request, *args, **kwargs):
+        if not self.fragments_enabled:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(self.render_fragments(list(queryset)))
+        return self.get_paginated_response(self.render_fragments(page))
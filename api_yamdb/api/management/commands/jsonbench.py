@@ -0,0 +1,126 @@
+import io
+import timeit
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.fastjson import FastJSONParser, FastJSONRenderer, orjson
+from api.serializers import (
+    CommentsSerializer, ReviewsSerializer, TitleReadSerializer
+)
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+GENRES_PER_TITLE = 3
+DESCRIPTION = (
+    'Экранизация романа о жизни провинциального города, снятая '
+    'в конце прошлого века. ' * 4
+)
+REVIEW_TEXT = (
+    'Сильная режиссура и хорошие актёры, но вторая половина заметно '
+    'провисает, а финал слишком предсказуем. ' * 3
+)
+COMMENT_TEXT = 'Согласен, финал можно было сделать интереснее.'
+
+
+def make_page(results):
+    """Страница в формате ClientPageNumberPagination."""
+    return {
+        'count': len(results) * 10,
+        'next': 'http://yamdb.fake/api/v1/titles/?page=3',
+        'previous': 'http://yamdb.fake/api/v1/titles/?page=1',
+        'results': results,
+    }
+
+
+def make_pages(size):
+    """Типичные страницы произведений, отзывов и комментариев.
+
+    Объекты не сохраняются в базу: страницы собираются теми же
+    сериализаторами, что и ответы API, поэтому база для замера не нужна.
+    """
+    created = timezone.make_aware(datetime(2022, 3, 1, 12, 30, 15))
+    category = Category(name='Фильм', slug='movie')
+    genres = [
+        Genre(pk=i, name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(GENRES_PER_TITLE)
+    ]
+    titles = []
+    for i in range(size):
+        title = Title(
+            pk=i + 1, name=f'Произведение {i}', year=1990 + i % 30,
+            description=DESCRIPTION, category=category,
+        )
+        title.rating = i % 10 + 1
+        title._prefetched_objects_cache = {'genre': genres}
+        titles.append(title)
+    authors = [User(username=f'user_{i}') for i in range(size)]
+    reviews = [
+        Review(
+            pk=i + 1, text=REVIEW_TEXT, author=author, score=i % 10 + 1,
+            pub_date=created,
+        )
+        for i, author in enumerate(authors)
+    ]
+    comments = [
+        Comment(pk=i + 1, text=COMMENT_TEXT, author=author, pub_date=created)
+        for i, author in enumerate(authors)
+    ]
+    return {
+        'titles': make_page(TitleReadSerializer(titles, many=True).data),
+        'reviews': make_page(ReviewsSerializer(reviews, many=True).data),
+        'comments': make_page(CommentsSerializer(comments, many=True).data),
+    }
+
+
+def best_of(func, repeat, number):
+    """Лучшее время одного вызова в микросекундах."""
+    seconds = min(timeit.repeat(func, repeat=repeat, number=number))
+    return seconds / number * 1e6
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время кодирования и разбора JSON и размер ответа '
+        'стандартных JSONRenderer/JSONParser DRF и api.fastjson на '
+        'страницах произведений, отзывов и комментариев.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size', type=int, default=100,
+            help='Объектов на странице, по умолчанию 100 (максимум API).',
+        )
+        parser.add_argument('--number', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING(
+                'orjson не установлен: api.fastjson работает через '
+                'стандартный json.'
+            ))
+        repeat, number = options['repeat'], options['number']
+        self.stdout.write(
+            f'{"страница":<10}{"байт":>9}{"байт fast":>11}'
+            f'{"render мкс":>12}{"fast":>9}{"parse мкс":>11}{"fast":>9}'
+        )
+        for name, data in make_pages(options['page_size']).items():
+            body = JSONRenderer().render(data)
+            fast_body = FastJSONRenderer().render(data)
+            timings = [
+                best_of(lambda: renderer.render(data), repeat, number)
+                for renderer in (JSONRenderer(), FastJSONRenderer())
+            ] + [
+                best_of(
+                    lambda: parser.parse(io.BytesIO(body)), repeat, number
+                )
+                for parser in (JSONParser(), FastJSONParser())
+            ]
+            self.stdout.write(
+                f'{name:<10}{len(body):>9}{len(fast_body):>11}'
+                f'{timings[0]:>12.1f}{timings[1]:>9.1f}'
+                f'{timings[2]:>11.1f}{timings[3]:>9.1f}'
+            )
@@ -0,0 +1,347 @@
+import http.client
+import json
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.ratings import reconcile_ratings
+from reviews.search import update_search_index
+
+LOAD_PREFIX = 'loadtest'
+SCENARIOS = ('browse', 'review', 'comments')
+DEFAULT_MIX = 'browse=70,review=10,comments=20'
+PERCENTILES = (50, 90, 99)
+REVIEWS_PER_TITLE = 5
+COMMENTS_PER_REVIEW = 3
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(samples, duration):
+    latencies = sorted(latency for latency, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    summary = {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': errors / len(samples),
+        'throughput': len(samples) / duration,
+    }
+    for p in PERCENTILES:
+        summary[f'p{p}_ms'] = percentile(latencies, p / 100) * 1000
+    summary['max_ms'] = latencies[-1] * 1000
+    return summary
+
+
+class Client:
+    """HTTP-клиент одного потока: постоянное соединение и замер задержек."""
+
+    def __init__(self, base_url, samples):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.samples = samples
+        self.connection = None
+
+    def request(self, method, route, path, token=None, body=None):
+        headers = {'Accept': 'application/json'}
+        payload = None
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        if body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        started = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(
+                    self.host, self.port, timeout=30
+                )
+            self.connection.request(method, path, payload, headers)
+            response = self.connection.getresponse()
+            status, data = response.status, response.read()
+        except Exception:
+            # Любой сбой запроса - ошибка в отчёте, а не смерть потока.
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = None
+            status, data = None, b''
+        self.samples[f'{method} {route}'].append((
+            time.perf_counter() - started,
+            status is not None and status < 400,
+        ))
+        return status, data
+
+
+class Scenarios:
+    """Сценарии нагрузки; маршруты берутся из URLconf api/urls.py."""
+
+    def __init__(self, title_ids, reviews, tokens):
+        self.title_ids = title_ids
+        self.reviews = reviews
+        self.tokens = tokens
+
+    def available(self):
+        """Сценарии, для которых в базе есть данные."""
+        pools = {
+            'browse': self.title_ids,
+            'review': self.title_ids,
+            'comments': self.reviews,
+        }
+        return {name for name, pool in pools.items() if pool}
+
+    def browse(self, client, worker):
+        pages = max(1, len(self.title_ids) // 5)
+        client.request(
+            'GET', 'titles-list',
+            reverse('api:titles-list') + f'?page={random.randint(1, pages)}'
+        )
+        client.request('GET', 'titles-detail', reverse(
+            'api:titles-detail', args=(random.choice(self.title_ids),)
+        ))
+
+    def review(self, client, worker):
+        """Публикует и удаляет отзыв от имени пользователя этого потока."""
+        token = self.tokens[worker]
+        title_id = random.choice(self.title_ids)
+        status, data = client.request(
+            'POST', 'reviews-list',
+            reverse('api:reviews-list', args=(title_id,)),
+            token=token, body={'text': 'Нагрузочный отзыв', 'score': 7},
+        )
+        if status != 201:
+            return
+        client.request('DELETE', 'reviews-detail', reverse(
+            'api:reviews-detail', args=(title_id, json.loads(data)['id'])
+        ), token=token)
+
+    def comments(self, client, worker):
+        client.request('GET', 'comments-list', reverse(
+            'api:comments-list', args=random.choice(self.reviews)
+        ))
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест API против запущенного сервера: задержки p50/p90/'
+        'p99, пропускная способность и доля ошибок по каждому маршруту.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url', default='http://127.0.0.1:8000',
+            help='Адрес сервера, работающего с той же базой данных.',
+        )
+        parser.add_argument('--duration', type=float, default=30)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--mix', default=DEFAULT_MIX,
+            help=f'Веса сценариев, по умолчанию {DEFAULT_MIX}.',
+        )
+        parser.add_argument(
+            '--titles', type=int, default=100,
+            help='Сколько тестовых произведений подготовить в базе.',
+        )
+        parser.add_argument('--output', help='Сохранить результаты в JSON.')
+        parser.add_argument(
+            '--compare', help='JSON прошлого прогона для сравнения.'
+        )
+
+    def handle(self, *args, **options):
+        scenarios = self.prepare(options['titles'], options['concurrency'])
+        mix = self.runnable_mix(
+            self.parse_mix(options['mix']), scenarios.available()
+        )
+        duration, samples = self.run(
+            scenarios, mix, options['base_url'],
+            options['concurrency'], options['duration'],
+        )
+        if not samples:
+            raise CommandError('Не выполнено ни одного запроса.')
+        result = {
+            'meta': {
+                'started': datetime.now().isoformat(timespec='seconds'),
+                'commit': self.commit(),
+                'base_url': options['base_url'],
+                'concurrency': options['concurrency'],
+                'duration': duration,
+                'mix': mix,
+            },
+            'total': summarize(
+                [s for route in samples.values() for s in route], duration
+            ),
+            'routes': {
+                route: summarize(route_samples, duration)
+                for route, route_samples in sorted(samples.items())
+            },
+        }
+        self.report(result)
+        if options['compare']:
+            self.compare(result, options['compare'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(result, file, ensure_ascii=False, indent=2)
+
+    def parse_mix(self, value):
+        mix = {}
+        for part in value.split(','):
+            name, _, weight = part.partition('=')
+            if name not in SCENARIOS or not weight:
+                raise CommandError(f'Неизвестный сценарий: {part}')
+            mix[name] = float(weight)
+        return mix
+
+    def runnable_mix(self, mix, available):
+        """Убирает из смеси сценарии, для которых нет данных."""
+        for name in set(mix) - available:
+            self.stderr.write(f'Сценарий {name} пропущен: нет данных.')
+        mix = {name: weight for name, weight in mix.items()
+               if name in available}
+        if not mix:
+            raise CommandError('Ни один сценарий не может выполняться.')
+        return mix
+
+    def prepare(self, titles, concurrency):
+        """Готовит данные в базе и токены пользователей потоков."""
+        category, _ = Category.objects.get_or_create(
+            slug=LOAD_PREFIX, defaults={'name': LOAD_PREFIX}
+        )
+        genre, _ = Genre.objects.get_or_create(
+            slug=LOAD_PREFIX, defaults={'name': LOAD_PREFIX}
+        )
+        existing = Title.objects.filter(category=category).count()
+        if existing < titles:
+            self.seed(category, genre, existing, titles)
+        users = [
+            User.objects.get_or_create(
+                username=f'{LOAD_PREFIX}_user_{i}',
+                defaults={'email': f'{LOAD_PREFIX}_user_{i}@yamdb.fake'},
+            )[0]
+            for i in range(concurrency)
+        ]
+        title_ids = list(Title.objects.filter(
+            category=category
+        ).values_list('pk', flat=True)[:titles])
+        reviews = list(Review.objects.filter(
+            title_id__in=title_ids, author__username__startswith=LOAD_PREFIX
+        ).exclude(author__in=users).values_list('title_id', 'pk'))
+        return Scenarios(
+            title_ids, reviews,
+            [str(AccessToken.for_user(user)) for user in users],
+        )
+
+    def seed(self, category, genre, start, stop):
+        authors = [
+            User.objects.get_or_create(
+                username=f'{LOAD_PREFIX}_author_{i}',
+                defaults={'email': f'{LOAD_PREFIX}_author_{i}@yamdb.fake'},
+            )[0]
+            for i in range(REVIEWS_PER_TITLE)
+        ]
+        titles = Title.objects.bulk_create(
+            Title(name=f'{LOAD_PREFIX} {i}', year=2000, category=category)
+            for i in range(start, stop)
+        )
+        titles = list(Title.objects.filter(
+            category=category, name__in=[title.name for title in titles]
+        ))
+        Title.genre.through.objects.bulk_create(
+            Title.genre.through(title_id=title.pk, genre_id=genre.pk)
+            for title in titles
+        )
+        Review.objects.bulk_create(
+            Review(title=title, author=author, text='Отзыв', score=8)
+            for title in titles for author in authors
+        )
+        Comment.objects.bulk_create(
+            Comment(review=review, author=authors[0], text='Комментарий')
+            for review in Review.objects.filter(title__in=titles)
+            for _ in range(COMMENTS_PER_REVIEW)
+        )
+        update_search_index(Title.objects.filter(category=category))
+        reconcile_ratings()
+
+    def run(self, scenarios, mix, base_url, concurrency, duration):
+        names, weights = list(mix), list(mix.values())
+        deadline = time.monotonic() + duration
+        samples = [defaultdict(list) for _ in range(concurrency)]
+
+        def worker(index):
+            client = Client(base_url, samples[index])
+            while time.monotonic() < deadline:
+                scenario = random.choices(names, weights)[0]
+                started = time.perf_counter()
+                try:
+                    getattr(scenarios, scenario)(client, index)
+                except Exception:
+                    # Например, неожиданный ответ: считаем ошибкой
+                    # сценария, поток продолжает работу.
+                    samples[index][f'scenario {scenario}'].append(
+                        (time.perf_counter() - started, False)
+                    )
+
+        started = time.monotonic()
+        threads = [
+            threading.Thread(target=worker, args=(i,))
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        merged = defaultdict(list)
+        for worker_samples in samples:
+            for route, route_samples in worker_samples.items():
+                merged[route].extend(route_samples)
+        return time.monotonic() - started, merged
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ('git', 'rev-parse', '--short', 'HEAD'),
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def report(self, result):
+        self.stdout.write(
+            f'{"маршрут":<24}{"запросов":>9}{"rps":>9}{"ошибок":>8}'
+            f'{"p50 мс":>9}{"p90 мс":>9}{"p99 мс":>9}'
+        )
+        rows = list(result['routes'].items()) + [('ИТОГО', result['total'])]
+        for route, summary in rows:
+            self.stdout.write(
+                f'{route:<24}{summary["requests"]:>9}'
+                f'{summary["throughput"]:>9.1f}'
+                f'{summary["error_rate"]:>8.1%}'
+                f'{summary["p50_ms"]:>9.1f}{summary["p90_ms"]:>9.1f}'
+                f'{summary["p99_ms"]:>9.1f}'
+            )
+
+    def compare(self, result, path):
+        with open(path, encoding='utf-8') as file:
+            previous = json.load(file)
+        self.stdout.write(
+            f'Сравнение с {previous["meta"].get("commit")} '
+            f'({previous["meta"]["started"]}):'
+        )
+        for route, summary in result['routes'].items():
+            before = previous['routes'].get(route)
+            if before is None:
+                continue
+            self.stdout.write(
+                f'{route:<24}rps {before["throughput"]:.1f} -> '
+                f'{summary["throughput"]:.1f}, p99 {before["p99_ms"]:.1f} -> '
+                f'{summary["p99_ms"]:.1f} мс'
+            )
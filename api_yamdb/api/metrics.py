@@ -0,0 +1,296 @@
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+from api_yamdb.db.pool import get_pools
+from reviews.outbox import get_metrics as get_outbox_metrics
+from .cache import get_cache, get_stats as get_cache_stats
+from .fragments import get_stats as get_fragment_stats
+
+PREFIX = 'yamdb'
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+OUTBOX_METRICS_KEY = f'{PREFIX}:metrics:outbox'
+
+
+def format_labels(labels):
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"')
+         .replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus, накопленная в памяти процесса."""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, label_values, value):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [
+                [0] * len(self.buckets), 0.0, 0
+            ]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def samples(self):
+        for label_values, (counts, total, count) in self.series.items():
+            labels = list(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                yield '_bucket', labels + [('le', bound)], cumulative
+            yield '_bucket', labels + [('le', '+Inf')], count
+            yield '_sum', labels, total
+            yield '_count', labels, count
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.series = {}
+
+    def inc(self, label_values, amount=1):
+        self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def samples(self):
+        for label_values, value in self.series.items():
+            yield '', list(zip(self.label_names, label_values)), value
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        labels = ('view', 'method')
+        self.requests = Counter(
+            f'{PREFIX}_http_requests_total',
+            'Обработанные запросы по представлению, методу и статусу.',
+            labels + ('status',),
+        )
+        self.latency = Histogram(
+            f'{PREFIX}_http_request_duration_seconds',
+            'Время обработки запроса.', labels, LATENCY_BUCKETS,
+        )
+        self.queries = Histogram(
+            f'{PREFIX}_db_queries_per_request',
+            'Количество запросов к БД за один HTTP-запрос.',
+            labels, QUERY_BUCKETS,
+        )
+        self.db_time = Histogram(
+            f'{PREFIX}_db_duration_seconds',
+            'Время в БД за один HTTP-запрос.', labels, LATENCY_BUCKETS,
+        )
+        self.size = Histogram(
+            f'{PREFIX}_http_response_size_bytes',
+            'Размер тела ответа.', labels, SIZE_BUCKETS,
+        )
+        self.metrics = (
+            self.requests, self.latency, self.queries, self.db_time,
+            self.size,
+        )
+
+    def record(self, view, method, status, duration, queries, db_time,
+               size):
+        labels = (view, method)
+        with self.lock:
+            self.requests.inc(labels + (status,))
+            self.latency.observe(labels, duration)
+            self.queries.observe(labels, queries)
+            self.db_time.observe(labels, db_time)
+            if size is not None:
+                self.size.observe(labels, size)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for metric in self.metrics:
+                lines.append(f'# HELP {metric.name} {metric.help_text}')
+                lines.append(f'# TYPE {metric.name} {metric.kind}')
+                for suffix, labels, value in metric.samples():
+                    lines.append(
+                        f'{metric.name}{suffix}{format_labels(labels)} {value}'
+                    )
+        return lines
+
+    def clear(self):
+        with self.lock:
+            for metric in self.metrics:
+                metric.series.clear()
+
+
+registry = Registry()
+# Дополнительные источники метрик: функции, возвращающие строки экспозиции.
+collectors = []
+
+
+def metric_lines(name, kind, help_text, value):
+    if value is None:
+        return []
+    return [
+        f'# HELP {PREFIX}_{name} {help_text}',
+        f'# TYPE {PREFIX}_{name} {kind}',
+        f'{PREFIX}_{name} {value}',
+    ]
+
+
+def gauge_lines(name, help_text, value):
+    return metric_lines(name, 'gauge', help_text, value)
+
+
+def counter_lines(name, help_text, value):
+    return metric_lines(f'{name}_total', 'counter', help_text, value)
+
+
+def collect_cache():
+    stats = get_cache_stats()
+    fragments = get_fragment_stats()
+    return (
+        counter_lines('response_cache_hits', 'Попадания в кэш ответов.',
+                      stats['hits'])
+        + counter_lines('response_cache_misses', 'Промахи кэша ответов.',
+                        stats['misses'])
+        + counter_lines('fragment_cache_hits',
+                        'Произведения списка, взятые из кэша фрагментов.',
+                        fragments['hits'])
+        + counter_lines('fragment_cache_misses',
+                        'Произведения списка, сериализованные заново.',
+                        fragments['misses'])
+    )
+
+
+def collect_outbox():
+    """Метрики очереди писем, не чаще раза в OUTBOX_METRICS_TTL секунд.
+
+    Запросы к таблице писем не выполняются на каждый опрос Prometheus:
+    результат хранится в общем кэше и переиспользуется всеми воркерами.
+    """
+    stats = get_cache().get_or_set(
+        OUTBOX_METRICS_KEY, get_outbox_metrics, settings.OUTBOX_METRICS_TTL
+    )
+    return (
+        gauge_lines('outbox_queue_depth', 'Писем в очереди.',
+                    stats['queue_depth'])
+        + gauge_lines('outbox_failed', 'Писем с исчерпанными попытками.',
+                      stats['failed'])
+        + gauge_lines('outbox_latency_p99_seconds',
+                      'p99 задержки доставки последних писем.',
+                      stats['latency_p99'])
+    )
+
+
+POOL_METRICS = (
+    ('size', 'gauge', 'Наибольшее число соединений в пуле.'),
+    ('open', 'gauge', 'Открытые соединения пула.'),
+    ('in_use', 'gauge', 'Соединения, выданные запросам.'),
+    ('idle', 'gauge', 'Свободные соединения пула.'),
+    ('checkouts', 'counter', 'Выдачи соединений из пула.'),
+    ('waits', 'counter', 'Выдачи, которым пришлось ждать соединения.'),
+    ('wait_seconds', 'counter', 'Суммарное ожидание соединения.'),
+    ('timeouts', 'counter', 'Запросы, не дождавшиеся соединения.'),
+    ('created', 'counter', 'Открытые пулом соединения.'),
+    ('discarded', 'counter', 'Закрытые пулом сломанные и старые соединения.'),
+)
+
+
+def collect_pools():
+    pools = {alias: pool.get_stats() for alias, pool in get_pools().items()}
+    lines = []
+    if not pools:
+        return lines
+    for key, kind, help_text in POOL_METRICS:
+        name = f'{PREFIX}_db_pool_{key}'
+        if kind == 'counter':
+            name += '_total'
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for alias, stats in pools.items():
+            lines.append(
+                f'{name}{format_labels([("alias", alias)])} {stats[key]}'
+            )
+    return lines
+
+
+collectors.extend((collect_cache, collect_outbox, collect_pools))
+
+
+class QueryObserver:
+    """execute_wrapper: считает запросы к БД и время, проведённое в ней."""
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.queries += 1
+
+
+class MetricsMiddleware:
+    """Собирает метрики каждого запроса по имени разрешённого представления.
+
+    Накладные расходы - пара вызовов perf_counter на запрос к БД и одна
+    короткая блокировка на HTTP-запрос. Метрики живут в памяти процесса:
+    каждый воркер gunicorn отдаёт свои, Prometheus суммирует их сам.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        observer = QueryObserver()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(observer)
+                )
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        registry.record(
+            match.view_name if match else 'unresolved',
+            request.method,
+            response.status_code,
+            duration,
+            observer.queries,
+            observer.duration,
+            None if response.streaming else len(response.content),
+        )
+        return response
+
+
+def metrics(request):
+    lines = registry.render()
+    for collector in collectors:
+        lines.extend(collector())
+    return HttpResponse('\n'.join(lines) + '\n', content_type=CONTENT_TYPE)
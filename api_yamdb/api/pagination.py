@@ -0,0 +1,56 @@
+from rest_framework.pagination import (
+    BasePagination, CursorPagination, PageNumberPagination
+)
+
+MAX_PAGE_SIZE = 100
+CURSOR_MODE = 'cursor'
+
+
+class ClientPageNumberPagination(PageNumberPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+
+class ClientCursorPagination(CursorPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+
+class PageNumberOrCursorPagination(BasePagination):
+    """Постраничная пагинация по умолчанию и курсорная по желанию клиента.
+
+    Курсорный режим включается параметром ?pagination=cursor (или самим
+    ?cursor=...) и доступен вьюсетам с атрибутом cursor_ordering. Он не
+    считает COUNT(*) и не использует OFFSET, поэтому глубокие страницы
+    стоят столько же, сколько первая. Ссылки next/previous сохраняют режим.
+    """
+    mode_query_param = 'pagination'
+
+    def get_paginator(self, request, view):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering and (
+            request.query_params.get(self.mode_query_param) == CURSOR_MODE
+            or ClientCursorPagination.cursor_query_param
+            in request.query_params
+        ):
+            paginator = ClientCursorPagination()
+            paginator.ordering = ordering
+            return paginator
+        return ClientPageNumberPagination()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request, view)
+        page = self.paginator.paginate_queryset(queryset, request, view)
+        self.display_page_controls = self.paginator.display_page_controls
+        return page
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return ClientPageNumberPagination().get_paginated_response_schema(
+            schema
+        )
+
+    def to_html(self):
+        return self.paginator.to_html()
@@ -1,11 +1,13 @@
-from django.core.exceptions import ValidationError
-from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 
+from .batch import BatchSlugRelatedField
+from .fieldsets import SparseFieldsSerializerMixin
+
 from reviews.models import (
     Category, Comment, Genre, Review, Title, User,
     EMAIL_LENGTH, USERNAME_LENGTH, CONFIRMATION_CODE_LENGTH
 )
+from reviews.rankings import recent_reviews
 from reviews.validators import (
     validate_username, validate_year
 )
@@ -82,13 +84,21 @@ class TitlesSerializer(serializers.ModelSerializer):
         model = Title
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
-    category = CategorySerializer(read_only=True)
-    genre = GenreSerializer(
-        read_only=True,
-        many=True
+class TitleReadSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
+    category = serializers.SlugRelatedField(
+        read_only=True, slug_field='slug'
+    )
+    genre = serializers.SlugRelatedField(
+        read_only=True, slug_field='slug', many=True
     )
     rating = serializers.IntegerField(read_only=True)
+    expandable_fields = {
+        'category': CategorySerializer(read_only=True),
+        'genre': GenreSerializer(read_only=True, many=True),
+    }
+    default_expand = ('category', 'genre')
 
     class Meta:
         fields = (
@@ -104,12 +114,27 @@ class TitleReadSerializer(serializers.ModelSerializer):
         model = Title
 
 
+class TitleRankingSerializer(TitleReadSerializer):
+    weighted_rating = serializers.FloatField(
+        source='ranking.weighted_rating', read_only=True
+    )
+    recent_reviews = serializers.SerializerMethodField()
+
+    class Meta(TitleReadSerializer.Meta):
+        fields = TitleReadSerializer.Meta.fields + (
+            'weighted_rating', 'recent_reviews'
+        )
+
+    def get_recent_reviews(self, obj):
+        return round(recent_reviews(obj.ranking.trend), 2)
+
+
 class TitleWriteSerializer(serializers.ModelSerializer):
-    category = serializers.SlugRelatedField(
+    category = BatchSlugRelatedField(
         queryset=Category.objects.all(),
         slug_field='slug'
     )
-    genre = serializers.SlugRelatedField(
+    genre = BatchSlugRelatedField(
         queryset=Genre.objects.all(),
         slug_field='slug',
         many=True
@@ -130,32 +155,52 @@ class TitleWriteSerializer(serializers.ModelSerializer):
         model = Title
 
 
-class ReviewsSerializer(serializers.ModelSerializer):
+class AuthorSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = User
+        fields = ('username', 'first_name', 'last_name')
+        read_only_fields = fields
+
+
+class TitleBriefSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name', 'year')
+        read_only_fields = fields
+
+
+class ReviewsSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username',
         default=serializers.CurrentUserDefault())
-
-    def validate(self, attrs):
-        if (
-            self.context['view'].action not in ('update', 'partial_update')
-            and Review.objects.filter(
-                author=self.context['request'].user,
-                title=get_object_or_404(
-                Title, pk=self.context['view'].kwargs.get('title_id')
-                )).exists()
-        ):
-            raise ValidationError('Можно оставить только один отзыв!')
-        return attrs
+    expandable_fields = {
+        'author': AuthorSerializer(read_only=True),
+        'title': TitleBriefSerializer(read_only=True),
+    }
 
     class Meta:
         model = Review
-        exclude = ('title',)
+        exclude = ('title', 'updated')
+
+
+class ReviewBatchSerializer(ReviewsSerializer):
+    """Отзыв в пакете администратора: автор указывается в каждом элементе."""
+    author = BatchSlugRelatedField(
+        slug_field='username', queryset=User.objects.all()
+    )
 
 
-class CommentsSerializer(serializers.ModelSerializer):
+class CommentsSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username'
     )
+    expandable_fields = {'author': AuthorSerializer(read_only=True)}
 
     class Meta:
         model = Comment
@@ -0,0 +1,62 @@
+from django.core.signals import request_started
+from django.db import connections
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from .authentication import bump_user_version
+from .cache import bump_version
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_model_version(sender, **kwargs):
+    bump_version(sender)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_title_genres_version(sender, action, **kwargs):
+    """Жанры входят в ETag и фрагменты произведения через его updated.
+
+    Сам updated отмечает reviews.signals.touch_title_genres.
+    """
+    if action.startswith('post_'):
+        bump_version(Title)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_title_rating_version(sender, **kwargs):
+    # Рейтинг произведения меняется через UPDATE без сигналов Title.
+    bump_version(Title)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_cached_user_version(sender, instance, **kwargs):
+    bump_user_version(instance.pk)
+
+
+@receiver(request_started)
+def check_database_connections(**kwargs):
+    """Закрывает сломанные постоянные соединения до начала запроса.
+
+    Замена CONN_HEALTH_CHECKS из Django 4.1: соединение, оставшееся от
+    прошлого запроса, проверяется, и Django откроет новое, если старое
+    разорвано сервером. Соединения из пула проверяет сам пул.
+    """
+    for connection in connections.all():
+        if (
+            connection.settings_dict.get('CONN_HEALTH_CHECKS')
+            and connection.connection is not None
+            and not connection.is_usable()
+        ):
+            connection.close()
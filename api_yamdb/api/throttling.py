@@ -0,0 +1,97 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+def get_throttle_cache():
+    return caches[settings.THROTTLE_CACHE_ALIAS]
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Корзина токенов в общем кэше.
+
+    Ставка 'N/период' - корзина на N запросов, которая наполняется
+    заново за период. Корзина хранится одним числом - моментом, когда
+    она снова станет полной (форма GCRA): проверка - одно чтение и одна
+    запись в кэш, база не читается. Ключей у запроса может быть несколько
+    (get_cache_keys); запрос проходит, только если токен есть в каждой из
+    корзин, и тогда списывается из всех. Чтение и запись не атомарны, как
+    и в SimpleRateThrottle: одновременные запросы с одним ключом могут
+    пропустить лишний запрос сверх корзины.
+    """
+    wait_seconds = None
+
+    def get_rate(self):
+        """Ставки читаются при каждом запросе, а не при импорте модуля."""
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_cache_keys(self, request, view):
+        """По умолчанию - корзина на адрес клиента (с учётом NUM_PROXIES)."""
+        return [self.make_key(self.get_ident(request))]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        keys = self.get_cache_keys(request, view)
+        if not keys:
+            return True
+        cache = get_throttle_cache()
+        now = self.timer()
+        interval = self.duration / self.num_requests
+        full_at = cache.get_many(keys)
+        updated = {
+            key: max(full_at.get(key, now), now) + interval for key in keys
+        }
+        overflow = max(updated.values()) - now - self.duration
+        if overflow > 0:
+            self.wait_seconds = overflow
+            return False
+        cache.set_many(updated, timeout=self.duration)
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+    def make_key(self, ident):
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class IdentityThrottle(TokenBucketThrottle):
+    """Корзины на значения полей identity_fields из тела запроса.
+
+    Значения приводятся к нижнему регистру и хэшируются: ключ не зависит
+    от длины и символов адреса почты.
+    """
+    identity_fields = ('username', 'email')
+
+    def get_cache_keys(self, request, view):
+        data = request.data
+        if not hasattr(data, 'get'):
+            return []
+        keys = []
+        for field in self.identity_fields:
+            value = data.get(field)
+            if isinstance(value, str) and value:
+                ident = hashlib.md5(f'{field}:{value.lower()}'.encode())
+                keys.append(self.make_key(ident.hexdigest()))
+        return keys
+
+
+class SignupIPThrottle(TokenBucketThrottle):
+    scope = 'signup'
+
+
+class SignupIdentityThrottle(IdentityThrottle):
+    scope = 'signup_identity'
+
+
+class TokenIPThrottle(TokenBucketThrottle):
+    scope = 'token'
+
+
+class TokenIdentityThrottle(IdentityThrottle):
+    scope = 'token_identity'
+    identity_fields = ('username',)
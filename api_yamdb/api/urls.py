@@ -2,8 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (CategoryViewSet, CommentsViewSet, GenreViewSet,
-                    ReviewsViewSet, TitleViewSet, UserViewSet, get_token,
-                    signup)
+                    ReviewsViewSet, TitleViewSet, UserViewSet, cache_stats,
+                    get_token, signup)
 
 app_name = 'api'
 router_v1 = DefaultRouter()
@@ -24,5 +24,6 @@ AUTHORIZATION_PATHS = [
 
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
-    path('v1/', include(AUTHORIZATION_PATHS))
+    path('v1/', include(AUTHORIZATION_PATHS)),
+    path('v1/cache-stats/', cache_stats, name='cache_stats'),
 ]
@@ -1,15 +1,16 @@
-import random
-
-from django.db import IntegrityError
-from django.core.mail import EmailMessage
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, filters, mixins, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (
+    action, api_view, permission_classes, throttle_classes
+)
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import ModelViewSet
 from rest_framework_simplejwt.tokens import AccessToken
 
@@ -18,15 +19,36 @@ from .permissions import (
 )
 from .serializers import (
     CategorySerializer, CommentsSerializer, GenreSerializer,
-    ReviewsSerializer, TitleReadSerializer,
-    TitlesSerializer, TitleWriteSerializer, TokenSerializer,
+    ReviewBatchSerializer, ReviewsSerializer, TitleRankingSerializer,
+    TitleReadSerializer, TitlesSerializer, TitleWriteSerializer,
+    TokenSerializer,
     UserAuthSerializers, UserSerializer
 )
+from api.batch import BatchCreateMixin, saves_one_by_one
+from api.cache import (
+    ResponseCacheMixin, RetrieveResponseCacheMixin, bump_version, get_stats
+)
+from api.conditional import ConditionalGetMixin
+from api.confirmation import get_code_store
+from api.fieldsets import SparseFieldsMixin
+from api.fragments import (
+    FragmentCacheMixin, get_stats as get_fragment_stats
+)
 from api.filters import TitleFilter
-from reviews.models import (
-    Category, Genre, Review, Title, User,
-    CONFIRMATION_CODE_LENGTH
+from api.pagination import ClientPageNumberPagination
+from api.throttling import (
+    SignupIdentityThrottle, SignupIPThrottle, TokenIdentityThrottle,
+    TokenIPThrottle
+)
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.outbox import enqueue_email
+from reviews.ratings import (
+    get_score_distribution, review_created, review_deleted, review_updated,
+    reviews_created
 )
+from reviews.search import update_search_index
+
+DUPLICATE_REVIEW = 'Можно оставить только один отзыв!'
 
 
 class UserViewSet(ModelViewSet):
@@ -60,56 +82,51 @@ class UserViewSet(ModelViewSet):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([SignupIPThrottle, SignupIdentityThrottle])
 def signup(request):
     serializer = UserAuthSerializers(data=request.data)
     serializer.is_valid(raise_exception=True)
     email = serializer.validated_data['email']
     username = serializer.validated_data['username']
-    try:
-        user, _ = User.objects.get_or_create(
-            username=username,
-            email=email
-        )
-    except IntegrityError:
-        return Response(
-            'Такой username или email уже существует',
-            status=status.HTTP_400_BAD_REQUEST
+    # Пользователь и письмо фиксируются вместе: без письма не остаётся
+    # созданного пользователя. Код выдаётся только после записи.
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                user, _ = User.objects.get_or_create(
+                    username=username,
+                    email=email
+                )
+        except IntegrityError:
+            return Response(
+                'Такой username или email уже существует',
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        code = get_code_store().issue(user)
+        enqueue_email(
+            subject='Код подтвержения для доступа к API!',
+            body=f'Здравствуйте, {username}. '
+                 f'\nКод подтвержения для доступа к API:'
+                 f'{code}',
+            to=email
         )
-    user.confirmation_code = ''.join(
-        random.sample('0123456789', CONFIRMATION_CODE_LENGTH)
-    )
-    user.save()
-    email = EmailMessage(
-        subject='Код подтвержения для доступа к API!',
-        body=f'Здравствуйте, {username}. '
-             f'\nКод подтвержения для доступа к API:{user.confirmation_code}',
-        to=[email]
-    )
-    email.send(fail_silently=False)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-def clear_code(user):
-    user.confirmation_code = ''
-    user.save()
-
-
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([TokenIPThrottle, TokenIdentityThrottle])
 def get_token(request):
     serializer = TokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     user = get_object_or_404(
         User, username=serializer.validated_data['username']
     )
-    if (
-        user.confirmation_code == serializer.data['confirmation_code']
-        and user.confirmation_code != ''
+    if get_code_store().consume(
+        user, serializer.validated_data['confirmation_code']
     ):
         token = AccessToken.for_user(user)
-        clear_code(user)
         return Response({'token': str(token)}, status=status.HTTP_200_OK)
-    clear_code(user)
     return Response((
         'Либо вы ошиблись, либо вы хотите обновить код подтверждения. '
         'Введите username и email через api/v1/auth/signup/. '
@@ -121,7 +138,17 @@ def get_token(request):
     )
 
 
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def cache_stats(request):
+    return Response(
+        {**get_stats(), 'fragments': get_fragment_stats()},
+        status=status.HTTP_200_OK
+    )
+
+
 class CategoryGenreBaseViewSet(
+    ResponseCacheMixin, BatchCreateMixin,
     mixins.CreateModelMixin, mixins.DestroyModelMixin,
     mixins.ListModelMixin, viewsets.GenericViewSet
 ):
@@ -129,58 +156,222 @@ class CategoryGenreBaseViewSet(
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+    batch_unique_fields = ('slug',)
+
+    def batch_created(self, objects):
+        bump_version(self.queryset.model)
 
 
 class CategoryViewSet(CategoryGenreBaseViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_models = (Category,)
 
 
 class GenreViewSet(CategoryGenreBaseViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_models = (Genre,)
 
 
-class TitleViewSet(ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    )
+class TitleViewSet(
+    ConditionalGetMixin, RetrieveResponseCacheMixin, BatchCreateMixin,
+    SparseFieldsMixin, FragmentCacheMixin, ModelViewSet
+):
+    queryset = Title.objects.all()
     serializer_class = TitlesSerializer
     permission_classes = (IsAdminUserOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
     ordering_fields = ('-rating', 'category', 'name', 'year')
+    cursor_ordering = ('name', 'id')
+    cache_models = (Title, Category, Genre)
+    etag_models = (Category, Genre)
+    fragment_models = (Category, Genre)
+    fragment_prefetch = ('genre',)
+
+    def get_queryset(self):
+        """JOIN категории и prefetch жанров - только для выводимых полей.
+
+        Поисковый вектор в ответах не участвует и не читается. Жанры
+        страницы из фрагментов подгружаются только для промахов.
+        """
+        titles = self.defer_unrequested(
+            Title.objects.defer('search_vector')
+        )
+        if self.wants('category'):
+            titles = titles.select_related('category')
+        if self.wants('genre') and not self.fragments_enabled:
+            titles = titles.prefetch_related('genre')
+        return titles
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitleReadSerializer
+        if self.action in ('top', 'trending'):
+            return TitleRankingSerializer
         return TitleWriteSerializer
 
+    def ranking_response(self, titles):
+        """Страница рейтинга; ?category= и ?genre= сужают выборку."""
+        page = self.paginate_queryset(
+            self.filter_queryset(titles.select_related('ranking'))
+        )
+        return self.get_paginated_response(
+            self.get_serializer(page, many=True).data
+        )
+
+    @action(detail=False, pagination_class=ClientPageNumberPagination)
+    def top(self, request):
+        """Лучшие произведения по взвешенному (байесовскому) рейтингу."""
+        return self.ranking_response(self.get_queryset().filter(
+            ranking__isnull=False
+        ).order_by('-ranking__weighted_rating', 'pk'))
 
-class ReviewsViewSet(ModelViewSet):
+    @action(detail=False, pagination_class=ClientPageNumberPagination)
+    def trending(self, request):
+        """Произведения с наибольшим числом свежих отзывов."""
+        return self.ranking_response(self.get_queryset().filter(
+            ranking__trend__isnull=False
+        ).order_by('-ranking__trend', 'pk'))
+
+    @action(detail=True)
+    def stats(self, request, pk=None):
+        """Число отзывов, рейтинг и распределение оценок произведения.
+
+        Читаются готовые счётчики: строка произведения и до десяти строк
+        TitleScoreCount, без агрегации по отзывам.
+        """
+        title = get_object_or_404(
+            Title.objects.only('review_count', 'rating'), pk=pk
+        )
+        return Response({
+            'review_count': title.review_count,
+            'rating': title.rating,
+            'scores': get_score_distribution(title.pk),
+        })
+
+    def batch_created(self, objects):
+        # При сохранении по одному произведения уже проиндексировал
+        # сигнал post_save (reviews.signals.index_title).
+        if not saves_one_by_one():
+            update_search_index(
+                Title.objects.filter(pk__in=[title.pk for title in objects])
+            )
+        bump_version(Title)
+
+
+class ReviewsViewSet(
+    ConditionalGetMixin, BatchCreateMixin, SparseFieldsMixin, ModelViewSet
+):
     serializer_class = ReviewsSerializer
     permission_classes = (IsAuthorModerAdminOrReadOnly,)
+    cursor_ordering = ('-pub_date', 'id')
+    batch_serializer_class = ReviewBatchSerializer
+    batch_permission_classes = (IsAdmin,)
 
-    def get_title(self):
+    @cached_property
+    def title(self):
+        """Произведение из URL; загружается один раз за запрос."""
         return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
 
+    def get_parent_validators(self):
+        return [self.title.updated.isoformat(), self.title.review_count]
+
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        """Для отдельных отзывов достаточно фильтра по title_id из URL."""
+        if self.detail:
+            reviews = Review.objects.filter(
+                title_id=self.kwargs.get('title_id')
+            )
+            if self.is_expanded('title'):
+                reviews = reviews.select_related('title')
+        else:
+            # Менеджер связи сам проставляет review.title из self.title.
+            reviews = self.title.reviews.all()
+        if self.wants('author'):
+            reviews = reviews.select_related('author')
+        return self.defer_unrequested(reviews)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        """Повторный отзыв отсекает ограничение unique_reviews в БД.
+
+        Дубликатом считается только ошибка вставки самого отзыва:
+        конфликты в счётчиках и рейтингах разрешаются там же.
+        """
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    review = serializer.save(
+                        author=self.request.user, title=self.title
+                    )
+            except IntegrityError:
+                raise ValidationError({
+                    api_settings.NON_FIELD_ERRORS_KEY: [DUPLICATE_REVIEW]
+                })
+            review_created(review)
+
+    def get_batch_save_kwargs(self):
+        return {'title': self.title}
+
+    def validate_batch(self, rows):
+        """Один отзыв на автора: и внутри пакета, и с уже имеющимися."""
+        errors = super().validate_batch(rows)
+        taken = set(self.title.reviews.filter(
+            author__in=[row['author'] for row in rows.values()]
+        ).values_list('author_id', flat=True))
+        for index, row in rows.items():
+            if row['author'].pk in taken:
+                errors[index] = {
+                    api_settings.NON_FIELD_ERRORS_KEY: [DUPLICATE_REVIEW]
+                }
+            taken.add(row['author'].pk)
+        return errors
+
+    def batch_created(self, objects):
+        reviews_created(self.title.pk, objects)
+        bump_version(Review)
+        bump_version(Title)
 
+    def perform_update(self, serializer):
+        old_score = serializer.instance.score
+        with transaction.atomic():
+            review_updated(serializer.save(), old_score)
 
-class CommentsViewSet(ModelViewSet):
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            review_deleted(instance)
+
+
+class CommentsViewSet(ConditionalGetMixin, SparseFieldsMixin, ModelViewSet):
     serializer_class = CommentsSerializer
     permission_classes = (IsAuthorModerAdminOrReadOnly,)
+    cursor_ordering = ('-pub_date', 'id')
 
-    def get_review(self):
-        return get_object_or_404(Review, pk=self.kwargs.get('review_id'))
+    @cached_property
+    def review(self):
+        """Отзыв из URL, проверенный на принадлежность произведению."""
+        return get_object_or_404(
+            Review,
+            pk=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id'),
+        )
+
+    def get_parent_validators(self):
+        return [self.review.updated.isoformat()]
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        if self.detail:
+            comments = Comment.objects.filter(
+                review_id=self.kwargs.get('review_id'),
+                review__title_id=self.kwargs.get('title_id'),
+            )
+        else:
+            comments = self.review.comments.all()
+        if self.wants('author'):
+            comments = comments.select_related('author')
+        return self.defer_unrequested(comments)
 
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user, review=self.get_review())
+        serializer.save(author=self.request.user, review=self.review)
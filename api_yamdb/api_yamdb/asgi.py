@@ -3,14 +3,106 @@ ASGI config for YaMDb project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
-For more information on this file, see
-https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
+Django 2.2 не умеет ASGI и асинхронные представления, поэтому приложение
+здесь - WSGI-обработчик Django за асинхронным адаптером. Соединения
+клиентов, чтение тела запроса и отправку ответа обслуживает цикл событий
+uvicorn, а сами представления выполняются в ограниченных пулах потоков:
+горячие чтения каталога (ASGI_READ_VIEWS) - в своём пуле размером
+ASGI_READ_THREADS, остальные запросы - в пуле ASGI_THREADS. Медленная
+запись или отправка почты не занимает потоки, обслуживающие чтение.
 """
 
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-from django.core.asgi import get_asgi_application
+from asgiref.wsgi import WsgiToAsgiInstance
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.urls import Resolver404, resolve
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
-application = get_asgi_application()
+READ_METHODS = ('GET', 'HEAD')
+
+
+class ExecutorWsgiInstance(WsgiToAsgiInstance):
+    """Запрос ASGI, исполняемый WSGI-приложением в заданном пуле потоков."""
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        await asyncio.get_event_loop().run_in_executor(
+            self.executor, self.run_wsgi_app_sync, body
+        )
+
+    def run_wsgi_app_sync(self, body):
+        environ = self.build_environ(self.scope, body)
+        response = self.wsgi_application(environ, self.start_response)
+        try:
+            for output in response:
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+                self.sync_send({
+                    'type': 'http.response.body',
+                    'body': output,
+                    'more_body': True,
+                })
+        finally:
+            # По спецификации WSGI; Django отправляет тут request_finished
+            # и возвращает соединения с БД.
+            if hasattr(response, 'close'):
+                response.close()
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({'type': 'http.response.body'})
+
+
+class ASGIHandler:
+
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+        self.read_views = frozenset(settings.ASGI_READ_VIEWS)
+        self.read_executor = ThreadPoolExecutor(
+            settings.ASGI_READ_THREADS, thread_name_prefix='asgi-read'
+        )
+        self.executor = ThreadPoolExecutor(
+            settings.ASGI_THREADS, thread_name_prefix='asgi'
+        )
+
+    def get_executor(self, scope):
+        if scope['method'] not in READ_METHODS:
+            return self.executor
+        try:
+            view_name = resolve(scope['path']).view_name
+        except Resolver404:
+            return self.executor
+        if view_name in self.read_views:
+            return self.read_executor
+        return self.executor
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.read_executor.shutdown()
+                self.executor.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        await ExecutorWsgiInstance(
+            self.wsgi_application, self.get_executor(scope)
+        )(scope, receive, send)
+
+
+application = ASGIHandler(get_wsgi_application())
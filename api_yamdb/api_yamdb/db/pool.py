@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+DEFAULT_POOL = {
+    'SIZE': 10,
+    'TIMEOUT': 10,
+    'MAX_LIFETIME': 3600,
+    'CHECK_INTERVAL': 5,
+}
+STATS = ('checkouts', 'waits', 'timeouts', 'created', 'discarded')
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """Ограниченный пул соединений psycopg2, общий для потоков процесса.
+
+    Соединение выдаётся из пула вместо открытия нового и возвращается
+    при закрытии обёртки Django. Открытых соединений не больше size;
+    когда все заняты, поток ждёт освобождения не дольше timeout секунд.
+    Перед выдачей соединение проверяется: закрытые и отжившие
+    max_lifetime отбрасываются, а простоявшие дольше check_interval
+    секунд проверяются запросом SELECT 1, если включены health_checks.
+    """
+
+    def __init__(self, size, timeout, max_lifetime, check_interval,
+                 health_checks):
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_interval = check_interval
+        self.health_checks = health_checks
+        self.condition = threading.Condition()
+        self.idle = deque()
+        self.born = {}
+        self.opened = 0
+        self.wait_seconds = 0.0
+        self.stats = dict.fromkeys(STATS, 0)
+
+    def checkout(self, connect):
+        started = time.monotonic()
+        with self.condition:
+            while not self.idle and self.opened >= self.size:
+                remaining = started + self.timeout - time.monotonic()
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f'Нет свободных соединений в пуле за {self.timeout} с'
+                    )
+                self.condition.wait(remaining)
+            waited = time.monotonic() - started
+            self.stats['checkouts'] += 1
+            self.wait_seconds += waited
+            if waited > 0.001:
+                self.stats['waits'] += 1
+            if self.idle:
+                connection, returned = self.idle.pop()
+            else:
+                connection, returned = None, None
+                self.opened += 1
+        if connection is not None:
+            if self.is_healthy(connection, returned):
+                return connection
+            self.close(connection, release=False)
+        try:
+            connection = connect()
+        except Exception:
+            self.release()
+            raise
+        with self.condition:
+            self.stats['created'] += 1
+            self.born[connection] = time.monotonic()
+        return connection
+
+    def checkin(self, connection, reusable=True):
+        if reusable and not self.is_expired(connection):
+            try:
+                status = connection.get_transaction_status()
+                if status != TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            except psycopg2.Error:
+                reusable = False
+        else:
+            reusable = False
+        if not reusable:
+            self.close(connection)
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def is_expired(self, connection):
+        born = self.born.get(connection, 0)
+        return (
+            connection.closed
+            or time.monotonic() - born > self.max_lifetime
+        )
+
+    def is_healthy(self, connection, returned):
+        if self.is_expired(connection):
+            return False
+        if (not self.health_checks
+                or time.monotonic() - returned < self.check_interval):
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except psycopg2.Error:
+            return False
+        return True
+
+    def close(self, connection, release=True):
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+        with self.condition:
+            self.born.pop(connection, None)
+            self.stats['discarded'] += 1
+        if release:
+            self.release()
+
+    def release(self):
+        with self.condition:
+            self.opened -= 1
+            self.condition.notify()
+
+    def get_stats(self):
+        with self.condition:
+            idle = len(self.idle)
+            return {
+                'size': self.size,
+                'open': self.opened,
+                'idle': idle,
+                'in_use': self.opened - idle,
+                'wait_seconds': self.wait_seconds,
+                **self.stats,
+            }
+
+
+def get_pool(alias, settings_dict):
+    """Пул текущего процесса для подключения alias.
+
+    Ключ включает pid: после fork воркер gunicorn заводит свой пул и не
+    трогает сокеты, унаследованные от родителя.
+    """
+    key = (alias, os.getpid())
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                options = {**DEFAULT_POOL, **settings_dict.get('POOL', {})}
+                pool = _pools[key] = ConnectionPool(
+                    size=options['SIZE'],
+                    timeout=options['TIMEOUT'],
+                    max_lifetime=options['MAX_LIFETIME'],
+                    check_interval=options['CHECK_INTERVAL'],
+                    health_checks=settings_dict.get(
+                        'CONN_HEALTH_CHECKS', False
+                    ),
+                )
+    return pool
+
+
+def get_pools():
+    """Пулы текущего процесса: {alias: pool}."""
+    pid = os.getpid()
+    return {
+        alias: pool for (alias, owner), pool in list(_pools.items())
+        if owner == pid
+    }
@@ -0,0 +1,32 @@
+from django.db.backends.postgresql import base
+
+from ..pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Бэкенд PostgreSQL, берущий соединения из пула процесса.
+
+    Django закрывает соединение в конце запроса (CONN_MAX_AGE = 0),
+    а закрытие здесь возвращает его в пул.
+    """
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self.alias, self.settings_dict)
+        connection = pool.checkout(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            )
+        )
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        reusable = not self.errors_occurred or self.is_usable()
+        with self.wrap_database_errors:
+            get_pool(self.alias, self.settings_dict).checkin(
+                self.connection, reusable
+            )
@@ -0,0 +1,125 @@
+import random
+import threading
+
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_KEY = 'replica:sticky:{}'
+RECENT_WRITE_KEY = 'replica:recent_write'
+
+_state = threading.local()
+
+
+def get_user_id(request):
+    """pk пользователя запроса без обращения к БД.
+
+    Подпись токена не проверяется: от pk зависит только выбор базы для
+    чтения, а проверку токена делает аутентификация DRF.
+    """
+    parts = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(parts) == 2 and parts[0] in jwt_settings.AUTH_HEADER_TYPES:
+        try:
+            payload = jwt.decode(
+                parts[1], options={'verify_signature': False}
+            )
+        except jwt.InvalidTokenError:
+            return None
+        return payload.get(jwt_settings.USER_ID_CLAIM)
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+def is_sticky(user_id):
+    return user_id is not None and cache.get(STICKY_KEY.format(user_id))
+
+
+def stick_to_primary(user_id):
+    cache.set(
+        STICKY_KEY.format(user_id), True, settings.DB_REPLICA_STICKY_SECONDS
+    )
+
+
+def note_write():
+    """Отмечает запись, после которой реплики какое-то время отстают."""
+    if settings.DATABASE_REPLICAS:
+        cache.set(RECENT_WRITE_KEY, True, settings.DB_REPLICA_STICKY_SECONDS)
+
+
+def may_read_stale():
+    """Читает ли запрос с реплики, которая может не видеть недавнюю запись.
+
+    Такие ответы нельзя класть в кэши с версиями: запись уже повысила
+    версию, и старые данные с реплики легли бы под новый ключ до
+    истечения TIMEOUT - в том числе для автора записи.
+    """
+    alias = getattr(_state, 'alias', None)
+    return (
+        alias is not None
+        and alias != DEFAULT_DB_ALIAS
+        and bool(cache.get(RECENT_WRITE_KEY))
+    )
+
+
+class ReplicaMiddleware:
+    """Выбирает базу для чтения на время запроса.
+
+    Безопасные запросы читают со случайной реплики из DATABASE_REPLICAS,
+    остальные - с основной базы. После успешной записи чтения того же
+    пользователя DB_REPLICA_STICKY_SECONDS секунд идут в основную базу,
+    чтобы он видел свои изменения, пока реплики догоняют. Отметка хранится
+    в кэше, общем для процессов, если кэш общий. Столько же после любого
+    повышения версии кэша (note_write) ответы, прочитанные с реплики, не
+    кэшируются (may_read_stale).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user_id = get_user_id(request)
+        if request.method in SAFE_METHODS and not is_sticky(user_id):
+            _state.alias = random.choice(settings.DATABASE_REPLICAS)
+        else:
+            _state.alias = DEFAULT_DB_ALIAS
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.alias = None
+        if (
+            request.method not in SAFE_METHODS
+            and user_id is not None
+            and response.status_code < 400
+        ):
+            stick_to_primary(user_id)
+        return response
+
+
+class ReplicaRouter:
+    """Чтение - в базу, выбранную ReplicaMiddleware, запись - в основную.
+
+    Вне HTTP-запроса (команды, фоновые задачи) всё идёт в основную базу.
+    Пользователи всегда читаются с основной базы: аутентификация не должна
+    зависеть от отставания реплики, а строка пользователя и так кэшируется
+    CachedJWTAuthentication. Миграции применяются только к основной базе,
+    реплики получают схему репликацией.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label == settings.AUTH_USER_MODEL:
+            return DEFAULT_DB_ALIAS
+        return getattr(_state, 'alias', None)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -28,6 +28,7 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'reviews.User'
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -39,6 +40,17 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'api_yamdb.urls'
 
+# Режим ASGI (APP_SERVER=asgi, см. asgi.py): размеры пулов потоков и
+# представления, которые обслуживаются отдельным пулом для чтения.
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', default=8))
+ASGI_READ_THREADS = int(os.getenv('ASGI_READ_THREADS', default=8))
+ASGI_READ_VIEWS = (
+    'api:titles-list',
+    'api:titles-detail',
+    'api:reviews-list',
+    'api:comments-list',
+)
+
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 TEMPLATES = [
     {
@@ -65,9 +77,85 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        # Сколько секунд держать соединение между запросами; 0 - закрывать.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        # Проверять переиспользуемое соединение перед запросом.
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', default='true').lower() == 'true',
+    }
+}
+
+# Пул соединений на процесс: имеет смысл с потоками gunicorn (--threads).
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', default=0))
+if DB_POOL_SIZE:
+    DATABASES['default'].update(
+        ENGINE='api_yamdb.db.postgresql',
+        CONN_MAX_AGE=0,
+        POOL={
+            'SIZE': DB_POOL_SIZE,
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=10)),
+            'MAX_LIFETIME': int(os.getenv('DB_POOL_MAX_LIFETIME', default=3600)),
+            'CHECK_INTERVAL': float(os.getenv('DB_POOL_CHECK_INTERVAL', default=5)),
+        },
+    )
+
+# Реплики для чтения: DB_REPLICAS=host[:port][/name],... Остальные
+# параметры подключения берутся из основной базы.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(filter(None, os.getenv('DB_REPLICAS', default='').split(','))):
+    location, _, name = replica.strip().partition('/')
+    host, _, port = location.partition(':')
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'NAME': name or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(alias)
+# Сколько секунд после записи читать данные пользователя с основной базы.
+DB_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', default=10))
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['api_yamdb.db.router.ReplicaRouter']
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.contrib.auth.middleware.AuthenticationMiddleware') + 1,
+        'api_yamdb.db.router.ReplicaMiddleware',
+    )
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+    }
+}
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', default=10000)),
+    }
+
+# Кэш ответов каталога (категории, жанры, произведения). Версии моделей
+# и пользователей JWT хранятся в том же кэше: с LocMemCache каждый процесс
+# инвалидирует только свои записи, для нескольких воркеров нужен общий
+# бэкенд. gunicorn.conf.py не запустит больше одного воркера с LocMemCache.
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', default=300))
+
+# Кэш представлений отдельных произведений (api.fragments): списки собираются
+# из готовых фрагментов, сериализуются только промахи. Версия фрагмента -
+# дата изменения строки произведения, поэтому кэш процесса не устаревает
+# и при нескольких воркерах. Размер ограничен FRAGMENT_CACHE_MAX_ENTRIES.
+FRAGMENT_CACHE_ENABLED = os.getenv('FRAGMENT_CACHE_ENABLED', default='true').lower() == 'true'
+FRAGMENT_CACHE_ALIAS = 'fragments'
+CACHES[FRAGMENT_CACHE_ALIAS] = {
+    'BACKEND': os.getenv('FRAGMENT_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+    'LOCATION': os.getenv('FRAGMENT_CACHE_LOCATION', default='yamdb-fragments'),
+    'TIMEOUT': int(os.getenv('FRAGMENT_CACHE_TIMEOUT', default=3600)),
 }
+if CACHES[FRAGMENT_CACHE_ALIAS]['BACKEND'].endswith('LocMemCache'):
+    CACHES[FRAGMENT_CACHE_ALIAS]['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('FRAGMENT_CACHE_MAX_ENTRIES', default=5000)),
+    }
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -102,17 +190,77 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Очередь писем: signup только пишет OutboxEmail, отправляет send_outbox.
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', default=100))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', default=5))
+OUTBOX_RETRY_DELAY = int(os.getenv('OUTBOX_RETRY_DELAY', default=30))
+# Через сколько секунд захваченное, но не отмеченное письмо (обработчик
+# упал во время отправки) снова попадает в очередь.
+OUTBOX_CLAIM_TIMEOUT = int(os.getenv('OUTBOX_CLAIM_TIMEOUT', default=300))
+# Сколько секунд хранятся отправленные и брошенные письма.
+OUTBOX_RETENTION = int(os.getenv('OUTBOX_RETENTION', default=86400))
+# Сколько секунд /metrics переиспользует глубину очереди и задержку писем.
+OUTBOX_METRICS_TTL = int(os.getenv('OUTBOX_METRICS_TTL', default=15))
+
+# Кодирование и разбор JSON через orjson, если он установлен
+# (api.fastjson); false - стандартные JSONRenderer и JSONParser DRF.
+FAST_JSON = os.getenv('FAST_JSON', default='true').lower() == 'true'
+
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.fastjson.FastJSONRenderer' if FAST_JSON else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.fastjson.FastJSONParser' if FAST_JSON else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.PageNumberOrCursorPagination',
     'PAGE_SIZE': 5,
+    # Корзины токенов регистрации и получения токена (api.throttling):
+    # 'N/период' - N запросов подряд, дальше по одному за период / N.
+    # Пустое значение в .env отключает ограничение.
+    'DEFAULT_THROTTLE_RATES': {
+        'signup': os.getenv('SIGNUP_RATE', default='20/m') or None,
+        'signup_identity': os.getenv('SIGNUP_IDENTITY_RATE', default='5/h') or None,
+        'token': os.getenv('TOKEN_RATE', default='30/m') or None,
+        'token_identity': os.getenv('TOKEN_IDENTITY_RATE', default='10/m') or None,
+    },
+    # Число прокси перед приложением: адрес клиента для ограничений берётся
+    # из X-Forwarded-For, дописанного последним из них. При 0 - REMOTE_ADDR.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=0)),
 }
 
+# Одноразовые коды подтверждения (api.confirmation): хранилище, кэш и
+# время жизни кода в секундах. Кэш, как и для корзин, должен быть общим.
+CONFIRMATION_CODE_STORE = 'api.confirmation.CacheCodeStore'
+CONFIRMATION_CODE_CACHE_ALIAS = 'default'
+CONFIRMATION_CODE_TTL = int(os.getenv('CONFIRMATION_CODE_TTL', default=86400))
+
+# Кэш корзин токенов. Для нескольких воркеров нужен общий бэкенд (Redis,
+# Memcached), иначе каждый процесс считает запросы отдельно.
+THROTTLE_CACHE_ALIAS = 'default'
+
+# Кэш пользователей JWT-аутентификации в памяти процесса.
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', default=1024))
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', default=60))
+
+# Рейтинги произведений (reviews.rankings): вес априорного среднего во
+# взвешенном рейтинге, в воображаемых отзывах, и период полураспада вклада
+# отзыва в тренд.
+RANKING_PRIOR_WEIGHT = int(os.getenv('RANKING_PRIOR_WEIGHT', default=10))
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', default=72))
+
+# Наибольшее число объектов в одном пакетном POST.
+BATCH_CREATE_MAX_ITEMS = int(os.getenv('BATCH_CREATE_MAX_ITEMS', default=100))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -0,0 +1,10 @@
+from .settings import *  # noqa: F401,F403
+
+# Тесты API работают на SQLite в памяти: в CI нет PostgreSQL.
+# test_settings при этом проверяет боевой модуль api_yamdb.settings.
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
@@ -0,0 +1,26 @@
+import os
+
+# APP_SERVER=asgi запускает api_yamdb.asgi в воркерах uvicorn,
+# по умолчанию - синхронный api_yamdb.wsgi. Воркер на asyncio и h11
+# не требует собираемых uvloop и httptools.
+if os.getenv('APP_SERVER', default='wsgi') == 'asgi':
+    worker_class = 'uvicorn.workers.UvicornH11Worker'
+
+
+def on_starting(server):
+    """Не даёт запустить несколько воркеров с кэшем в памяти процесса.
+
+    Версии кэша ответов и пользователей JWT, отметки недавней записи и
+    корзины ограничения запросов хранятся в кэше Django по умолчанию.
+    С LocMemCache у каждого воркера они свои, и запись, сделанная в
+    одном воркере, не сбрасывает кэши других.
+    """
+    backend = os.getenv(
+        'CACHE_BACKEND',
+        default='django.core.cache.backends.locmem.LocMemCache',
+    )
+    if server.cfg.workers > 1 and backend.endswith('LocMemCache'):
+        raise RuntimeError(
+            'Для нескольких воркеров нужен общий кэш: задайте '
+            'CACHE_BACKEND и CACHE_LOCATION (например, Redis).'
+        )
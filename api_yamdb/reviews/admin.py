@@ -1,10 +1,60 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 
-from .models import Category, Comment, Genre, Review, Title, User
+from .models import (
+    Category, Comment, Genre, OutboxEmail, Review, Title, User
+)
+from .search import search_titles
+
+# Таблицы меньше этого считаются точно: оценка планировщика для них
+# бывает заметно неточной, а COUNT(*) и так дешёв.
+ESTIMATE_THRESHOLD = 10000
+# Отфильтрованный список считается до этого числа строк, не дальше.
+COUNT_LIMIT = 10000
+
+
+class ApproximateCountPaginator(Paginator):
+    """Пагинатор списков админки без полного COUNT(*) по большим таблицам.
+
+    Нефильтрованный список на PostgreSQL берёт число строк из оценки
+    планировщика (pg_class.reltuples), которую обновляет autovacuum.
+    Отфильтрованный считается не дальше COUNT_LIMIT строк: последние
+    страницы большой выборки недоступны, зато подсчёт ограничен.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = self.estimate(queryset)
+            if estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        return queryset.order_by()[:COUNT_LIMIT].count()
+
+    def estimate(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row else 0
+
+
+class BaseAdmin(admin.ModelAdmin):
+    paginator = ApproximateCountPaginator
+    # Второй COUNT(*) по всей таблице ради «N из M» не нужен.
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
 
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(BaseAdmin):
     list_display = (
         'pk',
         'username',
@@ -13,13 +63,59 @@ class UserAdmin(admin.ModelAdmin):
         'email',
         'role',
         'bio',
-        'confirmation_code',
     )
-    search_fields = ('username', 'role',)
-    list_filter = ('username', 'role',)
-    empty_value_display = '-пусто-'
+    # Поиск по началу имени или почты идёт по индексам *_like, которые
+    # Django строит на PostgreSQL для уникальных строковых полей.
+    search_fields = ('username__startswith', 'email__startswith')
+    list_filter = ('role',)
 
 
-@admin.register(Category, Genre, Title, Review, Comment)
-class BaseAdmin(admin.ModelAdmin):
-    empty_value_display = '-пусто-'
+@admin.register(Category, Genre)
+class CategoryGenreAdmin(BaseAdmin):
+    list_display = ('name', 'slug')
+    search_fields = ('name', 'slug')
+
+
+@admin.register(Title)
+class TitleAdmin(BaseAdmin):
+    list_display = ('pk', 'name', 'year', 'category', 'rating')
+    list_select_related = ('category',)
+    autocomplete_fields = ('category', 'genre')
+    search_fields = ('name',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('search_vector')
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по полнотекстовому индексу, как в API."""
+        if not search_term:
+            return queryset, False
+        return search_titles(queryset, search_term), False
+
+
+@admin.register(Review)
+class ReviewAdmin(BaseAdmin):
+    list_display = ('pk', 'title', 'author', 'score', 'pub_date')
+    list_select_related = ('title', 'author')
+    autocomplete_fields = ('title', 'author')
+    search_fields = ('author__username__startswith',)
+    # Порядок по первичному ключу читается по индексу, а сортировка
+    # по pub_date перебрала бы всю таблицу.
+    ordering = ('-pk',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer(
+            'title__description', 'title__search_vector'
+        )
+
+
+@admin.register(Comment)
+class CommentAdmin(BaseAdmin):
+    list_display = ('pk', 'review', 'author', 'pub_date')
+    list_select_related = ('review', 'author')
+    autocomplete_fields = ('review', 'author')
+    search_fields = ('author__username__startswith',)
+    ordering = ('-pk',)
+
+
+admin.site.register(OutboxEmail, BaseAdmin)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from reviews.rankings import rebuild_rankings
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает с нуля взвешенный рейтинг и тренд произведений '
+        'для /titles/top/ и /titles/trending/.'
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_rankings()
+        self.stdout.write(
+            self.style.SUCCESS(f'Рейтинги пересчитаны: {count} произведений')
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from reviews.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет сохранённые рейтинг, количество и сумму оценок произведений '
+        'с таблицей отзывов и исправляет расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, ничего не изменяя.',
+        )
+
+    def handle(self, *args, **options):
+        drifted = reconcile_ratings(dry_run=options['dry_run'])
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Расхождений не найдено'))
+            return
+        ids = ', '.join(str(pk) for pk in drifted)
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f'Найдены расхождения у произведений: {ids}'
+            ))
+            return
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлены произведения: {ids}')
+        )
@@ -0,0 +1,74 @@
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from reviews.outbox import deliver_batch, get_metrics, purge_finished
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди OutboxEmail.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.OUTBOX_BATCH_SIZE,
+            help='Сколько писем отправлять за один проход.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, опрашивая очередь.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза между опросами пустой очереди, в секундах.',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Показать глубину очереди и задержку доставки и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            for name, value in get_metrics().items():
+                self.stdout.write(f'{name}: {value}')
+            return
+        connection = get_connection()
+        try:
+            while True:
+                sent, failed = self.drain(connection, options['batch_size'])
+                if sent or failed:
+                    self.stdout.write(
+                        f'Отправлено: {sent}, ошибок: {failed}'
+                    )
+                purge_finished()
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+    def drain(self, connection, batch_size):
+        """Отправляет пачки, пока в очереди есть готовые письма.
+
+        Соединение закрывается, когда очередь опустела: между опросами
+        сервер всё равно оборвал бы простаивающую сессию.
+        """
+        total_sent = total_failed = 0
+        try:
+            while True:
+                sent, failed = deliver_batch(connection, batch_size)
+                total_sent += sent
+                total_failed += failed
+                if sent + failed < batch_size:
+                    return total_sent, total_failed
+        finally:
+            connection.close()
@@ -1,9 +1,19 @@
 import csv
+import os
+import time
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
 
 from api_yamdb import settings
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (
+    Category, Comment, Genre, Review, Title, TitleRanking, TitleScoreCount,
+    TitleSearchToken, User
+)
+from reviews.ratings import reconcile_ratings
+from reviews.search import rebuild_search_index
 
 TABLES = (
     (User, 'users.csv'),
@@ -14,43 +24,188 @@ TABLES = (
     (Comment, 'comments.csv'),
 )
 GENRE_TITLE_TPL = (Title, 'genre_title.csv')
+DATA_DIR = os.path.join(settings.BASE_DIR, 'reviews', 'static', 'data')
+BATCH_SIZE = 1000
+# Колонка CSV -> (поле модели, на которую она ссылается).
+FOREIGN_KEYS = {
+    'category': ('category_id', Category),
+    'author': ('author_id', User),
+    'title_id': ('title_id', Title),
+    'review_id': ('review_id', Review),
+    'genre_id': ('genre_id', Genre),
+}
 
 
 class Command(BaseCommand):
+    help = 'Загружает данные из CSV-файлов в базу.'
 
-    def handle(self, *args, **kwargs):
-        # User.objects.all().delete()
-        # Genre.objects.all().delete()
-        # Category.objects.all().delete()
-        # Title.objects.all().delete()
-        # Review.objects.all().delete()
-        # Comment.objects.all().delete()
-
-        for tpl in TABLES:
-            model, csv_f = tpl
-            with open(
-                f'{settings.BASE_DIR}/reviews/static/data/{csv_f}',
-                'r',
-                encoding='utf-8'
-            ) as csv_file:
-                reader = csv.DictReader(csv_file)
-                for data in reader:
-                    if 'category' in data:
-                        obj = Category.objects.get(pk=int(data['category']))
-                        data['category'] = obj
-                    if 'author' in data:
-                        obj = User.objects.get(pk=int(data['author']))
-                        data['author'] = obj
-                    model.objects.get_or_create(**data)
-        model, csv_f = GENRE_TITLE_TPL
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Загружать пачками через bulk_create, без запросов '
+                 'на каждую строку.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Размер пачки bulk_create (по умолчанию {BATCH_SIZE}).',
+        )
+        parser.add_argument(
+            '--truncate',
+            action='store_true',
+            help='Очистить таблицы каталога и удалить пользователей из '
+                 'users.csv перед загрузкой. Остальные аккаунты '
+                 'сохраняются.',
+        )
+        parser.add_argument(
+            '--data-dir',
+            default=DATA_DIR,
+            help='Каталог с CSV-файлами.',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        self.data_dir = options['data_dir']
+        if options['truncate']:
+            self.truncate()
+        if options['bulk']:
+            self.load_bulk(options['batch_size'])
+        else:
+            self.load_rows()
+        # Отзывы загружены в обход ReviewsViewSet, пересчитываем рейтинги.
+        reconcile_ratings()
+        self.stdout.write(self.style.SUCCESS('Все данные загружены'))
+
+    def read_csv(self, csv_f):
         with open(
-                f'{settings.BASE_DIR}/reviews/static/data/{csv_f}',
-                'r',
-                encoding='utf-8'
+            os.path.join(self.data_dir, csv_f), 'r', encoding='utf-8'
         ) as csv_file:
             reader = csv.DictReader(csv_file)
             for data in reader:
-                title = Title.objects.get(pk=int(data['title_id']))
-                genre = Genre.objects.get(pk=int(data['genre_id']))
-                title.genre.add(genre)
-        self.stdout.write(self.style.SUCCESS('Все данные загружены'))
+                yield reader.line_num, data
+
+    def report(self, csv_f, rows, started, added=None):
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed else 0
+        message = (
+            f'{csv_f}: обработано {rows} строк за {elapsed:.2f} с '
+            f'({rate:.0f} строк/с)'
+        )
+        if added is not None:
+            message += f', добавлено {added}, пропущено {rows - added}'
+        self.stdout.write(message)
+
+    def truncate(self):
+        # Сначала таблицы, ссылающиеся на остальные: SQLite удаляет строки
+        # по одной таблице и проверяет внешние ключи, а TRUNCATE в
+        # PostgreSQL отказывает, если ссылающаяся таблица не в списке.
+        tables = [
+            model._meta.db_table
+            for model in (
+                Comment, Review, TitleSearchToken, TitleRanking,
+                TitleScoreCount, Title.genre.through, Title, Genre, Category,
+            )
+        ]
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sql_flush(no_style(), tables, ()):
+                    cursor.execute(sql)
+            # Настоящие аккаунты не трогаем: только загружаемые из CSV.
+            User.objects.filter(pk__in=[
+                int(data['id']) for _, data in self.read_csv('users.csv')
+            ]).delete()
+
+    def load_rows(self):
+        for model, csv_f in TABLES:
+            started = time.perf_counter()
+            rows = 0
+            for _, data in self.read_csv(csv_f):
+                if 'category' in data:
+                    obj = Category.objects.get(pk=int(data['category']))
+                    data['category'] = obj
+                if 'author' in data:
+                    obj = User.objects.get(pk=int(data['author']))
+                    data['author'] = obj
+                model.objects.get_or_create(**data)
+                rows += 1
+            self.report(csv_f, rows, started)
+        model, csv_f = GENRE_TITLE_TPL
+        started = time.perf_counter()
+        rows = 0
+        for _, data in self.read_csv(csv_f):
+            title = Title.objects.get(pk=int(data['title_id']))
+            genre = Genre.objects.get(pk=int(data['genre_id']))
+            title.genre.add(genre)
+            rows += 1
+        self.report(csv_f, rows, started)
+
+    def load_bulk(self, batch_size):
+        """Потоковая загрузка: одна транзакция и пачки INSERT на таблицу.
+
+        Внешние ключи проверяются по множествам id, прочитанным из базы
+        один раз на модель, связь жанров пишется прямо в промежуточную
+        таблицу. Строки с id, который уже есть в базе, пропускаются
+        (их ищет один запрос по первичному ключу на пачку); прочие
+        конфликты, например занятый slug, прерывают загрузку.
+        """
+        known_ids = {}
+        tables = TABLES + ((Title.genre.through, GENRE_TITLE_TPL[1]),)
+        for model, csv_f in tables:
+            started = time.perf_counter()
+            objs = self.build_objects(model, csv_f, known_ids)
+            rows = added = 0
+            with transaction.atomic():
+                while True:
+                    batch = list(islice(objs, batch_size))
+                    if not batch:
+                        break
+                    # id из CSV - строка, сравниваем в одном виде.
+                    existing = set(map(str, model.objects.filter(
+                        pk__in=[obj.pk for obj in batch]
+                    ).values_list('pk', flat=True)))
+                    new = [
+                        obj for obj in batch if str(obj.pk) not in existing
+                    ]
+                    try:
+                        model.objects.bulk_create(new)
+                    except IntegrityError as error:
+                        raise CommandError(f'{csv_f}: {error}')
+                    rows += len(batch)
+                    added += len(new)
+            self.report(csv_f, rows, started, added)
+        self.reset_sequences([model for model, _ in tables])
+        # bulk_create не вызывает post_save, индексируем произведения разом.
+        rebuild_search_index()
+
+    def build_objects(self, model, csv_f, known_ids):
+        for line, data in self.read_csv(csv_f):
+            for column, (field, related) in FOREIGN_KEYS.items():
+                if column in data:
+                    value = data.pop(column)
+                    data[field] = self.resolve(
+                        related, value, known_ids, f'{csv_f}:{line}'
+                    )
+            yield model(**data)
+
+    def resolve(self, related, value, known_ids, where):
+        if not value:
+            return None
+        if related not in known_ids:
+            known_ids[related] = set(
+                related.objects.values_list('pk', flat=True)
+            )
+        pk = int(value)
+        if pk not in known_ids[related]:
+            raise CommandError(
+                f'{where}: нет объекта {related.__name__} с id {pk}'
+            )
+        return pk
+
+    def reset_sequences(self, models):
+        """Строки вставлены с явными id, сдвигаем счётчики автоинкремента."""
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
@@ -0,0 +1,91 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:40
+
+import re
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+GIN_INDEX = 'reviews_title_search_vector_gin'
+
+# Копии reviews.search на момент миграции: историческая миграция не
+# должна меняться вместе с кодом приложения.
+TOKEN_RE = re.compile(r'[^\W_]+')
+TOKEN_LENGTH = 64
+NAME_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+FILL_SEARCH_VECTOR = (
+    "UPDATE reviews_title SET search_vector = "
+    "setweight(to_tsvector('russian'::regconfig, COALESCE(name, '')), 'A') "
+    "|| setweight(to_tsvector('russian'::regconfig, "
+    "COALESCE(description, '')), 'B')"
+)
+
+
+def tokenize(text):
+    return [token[:TOKEN_LENGTH] for token in TOKEN_RE.findall(text.lower())]
+
+
+def title_tokens(name, description):
+    weights = dict.fromkeys(tokenize(description), DESCRIPTION_WEIGHT)
+    weights.update(dict.fromkeys(tokenize(name), NAME_WEIGHT))
+    return weights
+
+
+def build_search_index(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX {GIN_INDEX} ON reviews_title '
+            'USING gin (search_vector)'
+        )
+        schema_editor.execute(FILL_SEARCH_VECTOR)
+        return
+    TitleSearchToken = apps.get_model('reviews', 'TitleSearchToken')
+    TitleSearchToken.objects.bulk_create(
+        (
+            TitleSearchToken(title_id=pk, token=token, weight=weight)
+            for pk, name, description in Title.objects.order_by().values_list(
+                'pk', 'name', 'description'
+            ).iterator()
+            for token, weight in title_tokens(name, description).items()
+        ),
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {GIN_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_review_comment_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='TitleSearchToken',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='reviews.Title')),
+            ],
+            options={
+                'verbose_name': 'Поисковый токен',
+                'verbose_name_plural': 'Поисковые токены',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titlesearchtoken',
+            index=models.Index(fields=['token', 'title'], name='title_search_token_idx'),
+        ),
+        migrations.RunPython(build_search_index, drop_search_index),
+    ]
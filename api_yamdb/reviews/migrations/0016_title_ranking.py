@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0015_outbox_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='reviews.Title')),
+                ('weighted_rating', models.FloatField(verbose_name='взвешенный рейтинг')),
+                ('trend', models.FloatField(blank=True, null=True, verbose_name='тренд')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг произведения',
+                'verbose_name_plural': 'Рейтинги произведений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['-weighted_rating', 'title'], name='ranking_weighted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['-trend', 'title'], name='ranking_trend_idx'),
+        ),
+    ]
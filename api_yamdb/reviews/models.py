@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 from .validators import validate_username, validate_year
 
@@ -17,6 +19,7 @@ EMAIL_LENGTH = 254
 CONFIRMATION_CODE_LENGTH = 8
 CATEGORY_GENRE_NAME_LENGTH = 256
 CATEGORY_GENRE_SLUG_LENGTH = 50
+SEARCH_TOKEN_LENGTH = 64
 
 
 class User(AbstractUser):
@@ -42,13 +45,6 @@ class User(AbstractUser):
         blank=True,
     )
     bio = models.TextField('биография', blank=True,)
-    confirmation_code = models.CharField(
-        'код подтверждения',
-        max_length=CONFIRMATION_CODE_LENGTH,
-        null=True,
-        blank=True,
-        default='XXXX',
-    )
 
     @property
     def is_user(self):
@@ -123,16 +119,128 @@ class Title(models.Model):
         null=True,
         blank=True,
     )
+    rating = models.FloatField(
+        'рейтинг',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    review_count = models.PositiveIntegerField(
+        'количество отзывов',
+        default=0,
+        editable=False,
+    )
+    score_sum = models.PositiveIntegerField(
+        'сумма оценок',
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('name',)
+        indexes = [
+            models.Index(
+                fields=('category', 'year'),
+                name='title_category_year_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class TitleSearchToken(models.Model):
+    """Токен названия или описания для поиска по префиксу вне PostgreSQL."""
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='search_tokens',
+    )
+    token = models.CharField(max_length=SEARCH_TOKEN_LENGTH)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        verbose_name = 'Поисковый токен'
+        verbose_name_plural = 'Поисковые токены'
+        indexes = [
+            models.Index(
+                fields=('token', 'title'),
+                name='title_search_token_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.token
+
+
+class TitleRanking(models.Model):
+    """Материализованные рейтинги произведения для топа и трендов.
+
+    Строку ведёт reviews.rankings: обновляет при каждом изменении отзывов
+    и пересобирает командой rebuild_rankings. trend - логарифм числа
+    отзывов с экспоненциальным затуханием, отсчитанного от TREND_EPOCH:
+    сортировка по нему не зависит от текущего момента.
+    """
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking',
+    )
+    weighted_rating = models.FloatField('взвешенный рейтинг')
+    trend = models.FloatField('тренд', null=True, blank=True)
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Рейтинг произведения'
+        verbose_name_plural = 'Рейтинги произведений'
+        indexes = [
+            models.Index(
+                fields=('-weighted_rating', 'title'),
+                name='ranking_weighted_idx',
+            ),
+            models.Index(
+                fields=('-trend', 'title'),
+                name='ranking_trend_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.title_id}: {self.weighted_rating:.2f}'
+
+
+class TitleScoreCount(models.Model):
+    """Сколько отзывов поставили произведению оценку score.
+
+    Счётчики ведёт reviews.ratings вместе со счётчиками Title, из них
+    строится распределение оценок без чтения таблицы отзывов.
+    """
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='score_counts',
+    )
+    score = models.PositiveSmallIntegerField('оценка')
+    count = models.PositiveIntegerField('отзывов', default=0)
+
+    class Meta:
+        verbose_name = 'Количество оценок'
+        verbose_name_plural = 'Количество оценок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('title', 'score'),
+                name='unique_title_score',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.title_id}: {self.score} x {self.count}'
+
+
 class BaseReviewComment(models.Model):
     text = models.TextField()
     author = models.ForeignKey(
@@ -140,6 +248,7 @@ class BaseReviewComment(models.Model):
     )
     pub_date = models.DateTimeField(
         'Дата добавления', auto_now_add=True, db_index=True)
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         abstract = True
@@ -162,6 +271,12 @@ class Review(BaseReviewComment):
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         default_related_name = 'reviews'
+        indexes = [
+            models.Index(
+                fields=('title', '-pub_date', 'id'),
+                name='review_title_pub_date_idx',
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=('author', 'title'),
@@ -177,3 +292,37 @@ class Comment(BaseReviewComment):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         default_related_name = 'comments'
+        indexes = [
+            models.Index(
+                fields=('review', '-pub_date', 'id'),
+                name='comment_review_pub_date_idx',
+            ),
+        ]
+
+
+class OutboxEmail(models.Model):
+    """Письмо, ожидающее отправки фоновым обработчиком send_outbox."""
+    subject = models.CharField('тема', max_length=255)
+    body = models.TextField('текст')
+    to = models.EmailField('получатель', max_length=EMAIL_LENGTH)
+    created = models.DateTimeField('создано', auto_now_add=True)
+    next_attempt = models.DateTimeField(
+        'следующая попытка', default=timezone.now
+    )
+    attempts = models.PositiveSmallIntegerField('попыток', default=0)
+    last_error = models.TextField('последняя ошибка', blank=True)
+    sent = models.DateTimeField('отправлено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('next_attempt', 'id')
+        indexes = [
+            models.Index(
+                fields=('sent', 'next_attempt'),
+                name='outbox_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
@@ -0,0 +1,145 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+LATENCY_SAMPLE = 1000
+
+
+def enqueue_email(subject, body, to):
+    """Ставит письмо в очередь.
+
+    Строка фиксируется сразу или вместе с транзакцией вызывающего кода,
+    если она открыта; отправляет письмо send_outbox.
+    """
+    return OutboxEmail.objects.create(subject=subject, body=body, to=to)
+
+
+def pending():
+    return OutboxEmail.objects.filter(
+        sent__isnull=True, attempts__lt=settings.OUTBOX_MAX_ATTEMPTS
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка: 1, 2, 4, ... базовых интервала."""
+    return timedelta(
+        seconds=settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def claim_batch(batch_size):
+    """Захватывает пачку готовых писем в короткой транзакции.
+
+    Строки выбираются SELECT ... FOR UPDATE SKIP LOCKED, и им сразу
+    засчитывается попытка и сдвигается next_attempt на
+    OUTBOX_CLAIM_TIMEOUT: пока обработчик отправляет письма вне
+    транзакции, другие их не возьмут, а письма упавшего обработчика
+    вернутся в очередь по истечении этого срока.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(pending().filter(
+            next_attempt__lte=now
+        ).select_for_update(skip_locked=True)[:batch_size])
+        OutboxEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(
+            attempts=F('attempts') + 1,
+            next_attempt=now + timedelta(
+                seconds=settings.OUTBOX_CLAIM_TIMEOUT
+            ),
+        )
+    for email in emails:
+        email.attempts += 1
+    return emails
+
+
+def deliver_batch(connection, batch_size):
+    """Отправляет одну пачку писем через общее SMTP-соединение.
+
+    Соединение открывается один раз и переиспользуется для всех писем;
+    после ошибки оно закрывается и открывается заново перед следующим
+    письмом. Каждое письмо отмечается отдельным UPDATE после отправки.
+    Возвращает количество отправленных и неудачных писем.
+    """
+    sent = failed = 0
+    for email in claim_batch(batch_size):
+        try:
+            connection.open()
+            EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                to=[email.to],
+                connection=connection,
+            ).send(fail_silently=False)
+        except Exception as error:
+            # После ошибки SMTP-сессия может быть сломана.
+            connection.close()
+            OutboxEmail.objects.filter(pk=email.pk).update(
+                last_error=str(error),
+                next_attempt=timezone.now() + retry_delay(email.attempts),
+            )
+            failed += 1
+        else:
+            OutboxEmail.objects.filter(pk=email.pk).update(
+                sent=timezone.now()
+            )
+            sent += 1
+    return sent, failed
+
+
+def purge_finished():
+    """Удаляет отправленные и брошенные письма старше OUTBOX_RETENTION.
+
+    В тексте писем открытым текстом лежат коды подтверждения, а без
+    очистки таблица растёт без ограничений. Возвращает число удалённых.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.OUTBOX_RETENTION)
+    return OutboxEmail.objects.filter(
+        Q(sent__lt=cutoff)
+        | Q(created__lt=cutoff, attempts__gte=settings.OUTBOX_MAX_ATTEMPTS)
+    ).delete()[0]
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def get_metrics():
+    """Глубина очереди и задержка доставки последних писем в секундах.
+
+    Неотправленные письма считаются одним запросом, задержка - по
+    последним LATENCY_SAMPLE отправленным; оба запроса идут по индексу
+    outbox_pending_idx, а таблицу ограничивает purge_finished.
+    """
+    now = timezone.now()
+    waiting = Q(attempts__lt=settings.OUTBOX_MAX_ATTEMPTS)
+    queue = OutboxEmail.objects.filter(sent__isnull=True).aggregate(
+        queue_depth=Count('pk', filter=waiting),
+        failed=Count('pk', filter=~waiting),
+        oldest=Min('created', filter=waiting),
+    )
+    latencies = sorted(
+        (sent - created).total_seconds()
+        for created, sent in OutboxEmail.objects.filter(
+            sent__isnull=False
+        ).order_by('-sent').values_list('created', 'sent')[:LATENCY_SAMPLE]
+    )
+    oldest = queue['oldest']
+    return {
+        'queue_depth': queue['queue_depth'],
+        'failed': queue['failed'],
+        'oldest_pending_age': (
+            (now - oldest).total_seconds() if oldest else None
+        ),
+        'latency_p50': percentile(latencies, 0.5),
+        'latency_p99': percentile(latencies, 0.99),
+    }
@@ -0,0 +1,195 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Case, ExpressionWrapper, F, FloatField, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Exp, Greatest, Least, Ln
+from django.utils import timezone
+
+from .models import Review, Title, TitleRanking
+
+# Начало отсчёта тренда. Вклад отзыва растёт со временем, а не затухает:
+# порядок произведений от этого не меняется, и значение в строке не нужно
+# пересчитывать по мере старения отзывов.
+TREND_EPOCH = datetime(2022, 1, 1, tzinfo=timezone.utc)
+# Отзывы старше стольких периодов полураспада пересборка не учитывает:
+# их вклад меньше тысячной доли свежего отзыва.
+TREND_WINDOW_HALF_LIVES = 10
+# Остаток тренда меньше этого (в логарифмах) считается пустым.
+TREND_EPSILON = 1e-6
+PRIOR_MEAN_KEY = 'rankings:prior_mean'
+PRIOR_MEAN_TIMEOUT = 3600
+REBUILD_BATCH_SIZE = 1000
+
+
+def trend_point(moment):
+    """Логарифм вклада отзыва, опубликованного в moment."""
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+    return (moment - TREND_EPOCH).total_seconds() * math.log(2) / half_life
+
+
+def log_sum(points):
+    """ln(сумма e^x) без переполнения."""
+    top = max(points)
+    return top + math.log(sum(math.exp(point - top) for point in points))
+
+
+def recent_reviews(trend, now=None):
+    """Число отзывов с затуханием на момент now."""
+    if trend is None:
+        return 0.0
+    return math.exp(trend - trend_point(now or timezone.now()))
+
+
+def get_prior_mean():
+    """Средняя оценка по всем отзывам - априорное среднее рейтинга.
+
+    Меняется медленно, поэтому берётся из кэша и пересчитывается раз в
+    PRIOR_MEAN_TIMEOUT секунд и при пересборке рейтингов.
+    """
+    mean = cache.get(PRIOR_MEAN_KEY)
+    if mean is None:
+        totals = Title.objects.aggregate(
+            count=Sum('review_count'), total=Sum('score_sum')
+        )
+        if not totals['count']:
+            return 0.0
+        mean = totals['total'] / totals['count']
+        cache.set(PRIOR_MEAN_KEY, mean, PRIOR_MEAN_TIMEOUT)
+    return mean
+
+
+def weighted_rating(review_count, score_sum, mean):
+    """Байесовский рейтинг произведения.
+
+    К отзывам добавляются RANKING_PRIOR_WEIGHT воображаемых отзывов со
+    средней оценкой mean, так что пара отличных оценок не обгоняет сотню
+    хороших. Принимает числа или выражения над полями Title.
+    """
+    weight = float(settings.RANKING_PRIOR_WEIGHT)
+    return (weight * mean + score_sum) / (weight + review_count)
+
+
+def trend_added(point):
+    trend = F('trend')
+    return Case(
+        When(trend__isnull=True, then=Value(point)),
+        default=Greatest(trend, Value(point)) + Ln(Value(1.0) + Exp(
+            Least(trend, Value(point)) - Greatest(trend, Value(point))
+        )),
+        output_field=FloatField(),
+    )
+
+
+def trend_removed(point):
+    trend = F('trend')
+    return Case(
+        When(
+            trend__gt=point + TREND_EPSILON,
+            then=trend + Ln(Value(1.0) - Exp(Value(point) - trend)),
+        ),
+        default=Value(None),
+        output_field=FloatField(),
+    )
+
+
+def refresh_title_ranking(title_id, added=(), removed=()):
+    """Обновляет строку рейтингов после изменения отзывов произведения.
+
+    Взвешенный рейтинг пересчитывается из счётчиков Title, уже сдвинутых
+    update_title_rating, тренд сдвигается на вклад отзывов с датами
+    публикации added и removed - одним UPDATE. Произведение без отзывов
+    выпадает из рейтингов, а строку, которой ещё нет, строит пересборка.
+    Если строку в это же время вставил параллельный запрос (первые два
+    отзыва к произведению), пересборка откатывается к точке сохранения,
+    и строка сдвигается тем же UPDATE.
+    """
+    if removed and TitleRanking.objects.filter(
+        title_id=title_id, title__review_count=0
+    ).delete()[0]:
+        return
+    changes = {'weighted_rating': Subquery(
+        Title.objects.filter(pk=title_id).annotate(weighted=ExpressionWrapper(
+            weighted_rating(
+                F('review_count'), F('score_sum'), get_prior_mean()
+            ),
+            output_field=FloatField(),
+        )).values('weighted')[:1]
+    )}
+    if added:
+        changes['trend'] = trend_added(
+            log_sum([trend_point(moment) for moment in added])
+        )
+    elif removed:
+        changes['trend'] = trend_removed(
+            log_sum([trend_point(moment) for moment in removed])
+        )
+    ranking = TitleRanking.objects.filter(title_id=title_id)
+    if ranking.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            rebuild_rankings(Title.objects.filter(pk=title_id))
+    except IntegrityError:
+        ranking.update(**changes)
+
+
+def write_rankings(rows, mean, since):
+    """Перезаписывает строки рейтингов для пачки (pk, отзывов, сумма)."""
+    ids = [pk for pk, _, _ in rows]
+    points = defaultdict(list)
+    reviews = Review.objects.filter(
+        title_id__in=ids, pub_date__gte=since
+    ).values_list('title_id', 'pub_date')
+    for title_id, pub_date in reviews.iterator():
+        points[title_id].append(trend_point(pub_date))
+    with transaction.atomic():
+        TitleRanking.objects.filter(title_id__in=ids).delete()
+        TitleRanking.objects.bulk_create(
+            TitleRanking(
+                title_id=pk,
+                weighted_rating=weighted_rating(count, total, mean),
+                trend=log_sum(points[pk]) if points[pk] else None,
+            )
+            for pk, count, total in rows
+        )
+
+
+def rebuild_rankings(titles=None):
+    """Пересчитывает рейтинги произведений с нуля и возвращает их число.
+
+    Полная пересборка (titles=None) заново считает априорное среднее.
+    Нужна после загрузки отзывов в обход API и периодически: строки,
+    обновлённые между пересборками, считаются с немного устаревшим
+    средним.
+    """
+    if titles is None:
+        titles = Title.objects.all()
+        cache.delete(PRIOR_MEAN_KEY)
+    mean = get_prior_mean()
+    since = timezone.now() - timedelta(
+        hours=settings.TRENDING_HALF_LIFE_HOURS * TREND_WINDOW_HALF_LIVES
+    )
+    rows = titles.filter(review_count__gt=0).order_by('pk').values_list(
+        'pk', 'review_count', 'score_sum'
+    )
+    count = 0
+    batch = []
+    for row in rows.iterator():
+        batch.append(row)
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            write_rankings(batch, mean, since)
+            count += len(batch)
+            batch = []
+    if batch:
+        write_rankings(batch, mean, since)
+        count += len(batch)
+    TitleRanking.objects.filter(
+        title__in=titles, title__review_count=0
+    ).delete()
+    return count
@@ -0,0 +1,187 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Count, Exists, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum,
+    Value
+)
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from .models import Review, Title, TitleScoreCount
+from .rankings import rebuild_rankings, refresh_title_ranking
+
+SCORES = range(1, 11)
+RATING_TOLERANCE = 1e-9
+
+
+def update_title_rating(title_id, count_delta, score_delta):
+    """Сдвигает счётчики произведения и пересчитывает рейтинг в одном UPDATE.
+
+    Правые части выражений ссылаются на значения до обновления, поэтому
+    рейтинг считается от уже сдвинутых количества и суммы оценок.
+    """
+    review_count = F('review_count') + count_delta
+    score_sum = F('score_sum') + score_delta
+    Title.objects.filter(pk=title_id).update(
+        review_count=review_count,
+        score_sum=score_sum,
+        rating=(
+            Cast(score_sum, FloatField())
+            / Cast(NullIf(review_count, 0), FloatField())
+        ),
+        updated=timezone.now(),
+    )
+
+
+def update_score_counts(title_id, deltas):
+    """Сдвигает счётчики оценок произведения; deltas - {оценка: сдвиг}.
+
+    Строка оценки создаётся при первом отзыве с ней; если её в это же
+    время создал параллельный запрос, счётчик сдвигается повторным UPDATE.
+    """
+    for score, delta in deltas.items():
+        counts = TitleScoreCount.objects.filter(title_id=title_id, score=score)
+        if not delta or counts.update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                TitleScoreCount.objects.create(
+                    title_id=title_id, score=score, count=delta
+                )
+        except IntegrityError:
+            counts.update(count=F('count') + delta)
+
+
+def reviews_created(title_id, reviews):
+    update_title_rating(
+        title_id, len(reviews), sum(review.score for review in reviews)
+    )
+    update_score_counts(title_id, Counter(review.score for review in reviews))
+    refresh_title_ranking(
+        title_id, added=[review.pub_date for review in reviews]
+    )
+
+
+def review_created(review):
+    reviews_created(review.title_id, [review])
+
+
+def review_updated(review, old_score):
+    if review.score != old_score:
+        update_title_rating(review.title_id, 0, review.score - old_score)
+        update_score_counts(
+            review.title_id, {old_score: -1, review.score: 1}
+        )
+        refresh_title_ranking(review.title_id)
+
+
+def review_deleted(review):
+    update_title_rating(review.title_id, -1, -review.score)
+    update_score_counts(review.title_id, {review.score: -1})
+    refresh_title_ranking(review.title_id, removed=(review.pub_date,))
+
+
+def get_score_distribution(title_id):
+    """Число отзывов с каждой из оценок SCORES."""
+    counts = dict(TitleScoreCount.objects.filter(
+        title_id=title_id
+    ).values_list('score', 'count'))
+    return [
+        {'score': score, 'count': counts.get(score, 0)}
+        for score in SCORES
+    ]
+
+
+def rebuild_score_counts(title_ids):
+    """Пересчитывает счётчики оценок произведений по таблице отзывов."""
+    with transaction.atomic():
+        TitleScoreCount.objects.filter(title_id__in=title_ids).delete()
+        TitleScoreCount.objects.bulk_create(
+            TitleScoreCount(
+                title_id=row['title'], score=row['score'], count=row['count']
+            )
+            for row in Review.objects.filter(title_id__in=title_ids).values(
+                'title', 'score'
+            ).annotate(count=Count('pk')).order_by()
+        )
+
+
+def rating_drift():
+    """Произведения, чьи сохранённые счётчики разошлись с таблицей отзывов.
+
+    Сверяются количество и сумма оценок, рейтинг (с допуском на округление
+    float) и счётчики оценок TitleScoreCount: строка с неверным числом
+    или оценка из отзывов, для которой строки нет.
+    """
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    score_reviews = Review.objects.filter(
+        title=OuterRef('title'), score=OuterRef('score')
+    ).order_by().values('title')
+    stale_counts = TitleScoreCount.objects.filter(
+        title=OuterRef('pk')
+    ).annotate(actual=Coalesce(Subquery(
+        score_reviews.annotate(count=Count('pk')).values('count'),
+        output_field=IntegerField(),
+    ), 0)).exclude(count=F('actual'))
+    uncounted_reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).annotate(counted=Exists(TitleScoreCount.objects.filter(
+        title=OuterRef('title'), score=OuterRef('score')
+    ))).filter(counted=False)
+    titles = Title.objects.annotate(
+        actual_count=Coalesce(
+            Subquery(reviews.annotate(count=Count('pk')).values('count')), 0
+        ),
+        actual_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')), 0
+        ),
+        actual_rating=(
+            Cast(F('actual_sum'), FloatField())
+            / Cast(NullIf(F('actual_count'), 0), FloatField())
+        ),
+        stale_counts=Exists(stale_counts),
+        uncounted_reviews=Exists(uncounted_reviews),
+    )
+    tolerance = Value(RATING_TOLERANCE, output_field=FloatField())
+    return titles.filter(
+        ~Q(review_count=F('actual_count'), score_sum=F('actual_sum'))
+        | Q(rating__isnull=True, actual_count__gt=0)
+        | Q(rating__isnull=False, actual_count=0)
+        | Q(rating__lt=F('actual_rating') - tolerance)
+        | Q(rating__gt=F('actual_rating') + tolerance)
+        | Q(stale_counts=True)
+        | Q(uncounted_reviews=True)
+    )
+
+
+def reconcile_ratings(dry_run=False):
+    """Исправляет расхождения и возвращает список pk затронутых произведений.
+
+    Каждое произведение пересчитывается под блокировкой строки, чтобы
+    параллельно создаваемые отзывы не потерялись.
+    """
+    drifted = list(rating_drift().values_list('pk', flat=True))
+    if dry_run:
+        return drifted
+    for pk in drifted:
+        with transaction.atomic():
+            title = Title.objects.select_for_update().get(pk=pk)
+            stats = title.reviews.aggregate(
+                count=Count('pk'), total=Sum('score')
+            )
+            title.review_count = stats['count']
+            title.score_sum = stats['total'] or 0
+            title.rating = (
+                title.score_sum / title.review_count
+                if title.review_count else None
+            )
+            title.save(update_fields=(
+                'review_count', 'score_sum', 'rating', 'updated'
+            ))
+    if drifted:
+        rebuild_score_counts(drifted)
+        rebuild_rankings(Title.objects.filter(pk__in=drifted))
+    return drifted
@@ -0,0 +1,119 @@
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector
+)
+from django.db import connection, transaction
+from django.db.models import F, IntegerField, OuterRef, Q, Subquery, Sum
+
+from .models import SEARCH_TOKEN_LENGTH, Title, TitleSearchToken
+
+SEARCH_CONFIG = 'russian'
+TOKEN_RE = re.compile(r'[^\W_]+')
+NAME_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+MAX_TERMS = 8
+INDEX_BATCH_SIZE = 1000
+# Верхняя граница диапазона: token >= 'abc' AND token < 'abc' + PREFIX_END
+# ищет по префиксу и при этом использует обычный B-tree индекс.
+PREFIX_END = '\U0010ffff'
+
+
+def uses_search_vector():
+    return connection.vendor == 'postgresql'
+
+
+def tokenize(text):
+    return [
+        token[:SEARCH_TOKEN_LENGTH]
+        for token in TOKEN_RE.findall(text.lower())
+    ]
+
+
+def title_tokens(name, description):
+    """Токены произведения с весами: слово из названия важнее описания."""
+    weights = dict.fromkeys(tokenize(description), DESCRIPTION_WEIGHT)
+    weights.update(dict.fromkeys(tokenize(name), NAME_WEIGHT))
+    return weights
+
+
+def search_vector():
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_index(titles):
+    """Пересобирает поисковый индекс для queryset произведений.
+
+    На PostgreSQL обновляет search_vector одним UPDATE, на остальных СУБД
+    перезаписывает токены в TitleSearchToken.
+    """
+    if uses_search_vector():
+        titles.update(search_vector=search_vector())
+        return
+    rows = titles.order_by().values_list('pk', 'name', 'description')
+    batch = []
+    for row in rows.iterator():
+        batch.append(row)
+        if len(batch) >= INDEX_BATCH_SIZE:
+            _replace_tokens(batch)
+            batch = []
+    _replace_tokens(batch)
+
+
+def _replace_tokens(rows):
+    if not rows:
+        return
+    tokens = [
+        TitleSearchToken(title_id=pk, token=token, weight=weight)
+        for pk, name, description in rows
+        for token, weight in title_tokens(name, description).items()
+    ]
+    with transaction.atomic():
+        TitleSearchToken.objects.filter(
+            title_id__in=[pk for pk, _, _ in rows]
+        ).delete()
+        # Размер пачки INSERT Django подбирает сам под ограничения СУБД.
+        TitleSearchToken.objects.bulk_create(tokens)
+
+
+def search_titles(queryset, text):
+    """Произведения, содержащие все слова запроса, по убыванию релевантности.
+
+    Каждое слово ищется как префикс, чтобы поиск работал по мере набора.
+    """
+    terms = tokenize(text)[:MAX_TERMS]
+    if not terms:
+        return queryset.none()
+    if uses_search_vector():
+        query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            config=SEARCH_CONFIG,
+            search_type='raw',
+        )
+        queryset = queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        )
+    else:
+        matched = Q()
+        for term in terms:
+            prefix = Q(token__gte=term, token__lt=term + PREFIX_END)
+            queryset = queryset.filter(pk__in=TitleSearchToken.objects.filter(
+                prefix
+            ).values('title'))
+            matched |= prefix
+        rank = TitleSearchToken.objects.filter(
+            matched, title=OuterRef('pk')
+        ).order_by().values('title').annotate(
+            rank=Sum('weight')
+        ).values('rank')
+        queryset = queryset.annotate(
+            rank=Subquery(rank, output_field=IntegerField())
+        )
+    return queryset.order_by('-rank', 'name', 'id')
+
+
+def rebuild_search_index():
+    update_search_index(Title.objects.all())
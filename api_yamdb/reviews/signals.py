@@ -0,0 +1,41 @@
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Title
+from .search import update_search_index
+
+SEARCH_FIELDS = {'name', 'description'}
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not SEARCH_FIELDS & set(update_fields):
+        return
+    update_search_index(Title.objects.filter(pk=instance.pk))
+
+
+def touch_titles(titles):
+    """Отмечает изменение произведений, у которых поменялись связи.
+
+    Дата изменения произведения входит в ETag ответа API и в ключ его
+    фрагмента. Правки категорий и жанров сюда не относятся: их учитывают
+    версии этих моделей в кэше, а не UPDATE всех их произведений.
+    """
+    titles.update(updated=timezone.now())
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_title_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    """Отмечает изменение произведений, у которых меняется набор жанров.
+
+    При genre.titles.clear() список произведений известен только до
+    очистки, поэтому обратная очистка обрабатывается на pre_clear.
+    """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            touch_titles(Title.objects.filter(pk=instance.pk))
+    elif action in ('post_add', 'post_remove') and pk_set:
+        touch_titles(Title.objects.filter(pk__in=pk_set))
+    elif action == 'pre_clear':
+        touch_titles(instance.titles.all())
@@ -0,0 +1,39 @@
+import pytest
+
+from reviews.models import Category, Genre, Title
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def genres():
+    return [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def title(category, genres):
+    title = Title.objects.create(
+        name='Побег из Шоушенка', year=1994, category=category
+    )
+    title.genre.set(genres[:2])
+    return title
+
+
+@pytest.fixture
+def make_titles(category, genres):
+    def make(count):
+        titles = []
+        for i in range(count):
+            title = Title.objects.create(
+                name=f'Произведение {i}', year=2000 + i, category=category
+            )
+            title.genre.set(genres)
+            titles.append(title)
+        return titles
+    return make
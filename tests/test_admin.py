@@ -0,0 +1,76 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews import admin
+from reviews.models import Review
+
+
+@pytest.fixture
+def staff_client(client, django_user_model):
+    user = django_user_model.objects.create_superuser(
+        username='boss', email='boss@yamdb.fake', password='secret'
+    )
+    client.force_login(user)
+    return client
+
+
+def get_page(client, url, **params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == 200
+    return response, [query['sql'] for query in context]
+
+
+@pytest.mark.django_db
+class TestAdmin:
+
+    def test_review_changelist_joins_relations(
+        self, staff_client, make_titles, user, another_user
+    ):
+        for title in make_titles(3):
+            for author in (user, another_user):
+                Review.objects.create(
+                    title=title, author=author, text='Да', score=5
+                )
+        _, queries = get_page(staff_client, '/admin/reviews/review/')
+        selects = [sql for sql in queries if 'FROM "reviews_review"' in sql]
+        # Подсчёт и страница вместе с авторами и произведениями.
+        assert len(selects) == 2
+        assert 'search_vector' not in selects[-1]
+
+    def test_filtered_count_is_capped(
+        self, staff_client, monkeypatch, django_user_model
+    ):
+        monkeypatch.setattr(admin, 'COUNT_LIMIT', 2)
+        for i in range(4):
+            django_user_model.objects.create(
+                username=f'reader{i}', email=f'reader{i}@yamdb.fake'
+            )
+        response, queries = get_page(
+            staff_client, '/admin/reviews/user/', q='reader'
+        )
+        assert response.context['cl'].result_count == 2
+        search = [sql for sql in queries if 'LIKE' in sql]
+        assert search and not any('UPPER' in sql for sql in search)
+
+    def test_title_search_uses_index(self, staff_client, make_titles):
+        titles = make_titles(2)
+        titles[1].name = 'Зеркало'
+        titles[1].save()
+        response, _ = get_page(
+            staff_client, '/admin/reviews/title/', q='зерк'
+        )
+        assert list(response.context['cl'].result_list) == [titles[1]]
+
+    def test_genre_autocomplete(self, staff_client, genres):
+        response, _ = get_page(
+            staff_client, '/admin/reviews/genre/autocomplete/', term='genre'
+        )
+        assert len(response.json()['results']) == 3
+
+    def test_user_list_has_no_username_filter(self, staff_client):
+        response, _ = get_page(staff_client, '/admin/reviews/user/')
+        assert [
+            spec.title for spec in response.context['cl'].filter_specs
+        ] == ['пользовательская роль']
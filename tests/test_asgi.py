@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+import pytest
+from django.core.signals import request_finished
+
+from api_yamdb.asgi import application
+
+
+def scope(method, path):
+    return {
+        'type': 'http', 'method': method, 'path': path, 'query_string': b'',
+        'http_version': '1.1', 'headers': [(b'host', b'testserver')],
+    }
+
+
+def call(method, path):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(application(scope(method, path), receive, send))
+    return messages
+
+
+class TestASGI:
+
+    def test_hot_reads_use_read_pool(self):
+        assert application.get_executor(
+            scope('GET', '/api/v1/titles/')
+        ) is application.read_executor
+        assert application.get_executor(
+            scope('GET', '/api/v1/titles/1/reviews/1/comments/')
+        ) is application.read_executor
+        assert application.get_executor(
+            scope('POST', '/api/v1/titles/')
+        ) is application.executor
+        assert application.get_executor(
+            scope('GET', '/api/v1/users/me/')
+        ) is application.executor
+
+    @pytest.mark.django_db(transaction=True)
+    def test_response_is_sent_and_request_finished(self):
+        finished = []
+
+        def on_finished(**kwargs):
+            finished.append(True)
+
+        request_finished.connect(on_finished)
+        try:
+            messages = call('GET', '/api/v1/categories/')
+        finally:
+            request_finished.disconnect(on_finished)
+        assert messages[0]['type'] == 'http.response.start'
+        assert messages[0]['status'] == 200
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        assert json.loads(body)['results'] == []
+        assert finished == [True]
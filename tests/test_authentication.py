@@ -0,0 +1,46 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestCachedAuthentication:
+
+    def user_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        return response, [
+            query for query in context.captured_queries
+            if 'reviews_user' in query['sql']
+        ]
+
+    def test_user_row_is_read_once(self, user_client):
+        _, queries = self.user_queries(user_client, '/api/v1/users/me/')
+        assert len(queries) == 1
+        response, queries = self.user_queries(
+            user_client, '/api/v1/users/me/'
+        )
+        assert response.status_code == 200
+        assert queries == []
+
+    # Версии повышаются после COMMIT, нужна настоящая транзакция.
+    @pytest.mark.django_db(transaction=True)
+    def test_role_change_applies_immediately(
+        self, user, user_client, admin_api_client
+    ):
+        assert user_client.get('/api/v1/users/').status_code == 403
+        response = admin_api_client.patch(
+            f'/api/v1/users/{user.username}/', {'role': 'admin'}
+        )
+        assert response.status_code == 200
+        assert user_client.get('/api/v1/users/').status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_deactivated_user_is_rejected(self, user, user_client):
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        with transaction.atomic():
+            user.is_active = False
+            user.save()
+            # Чтение до фиксации не должно попасть под новую версию.
+            assert user_client.get('/api/v1/users/me/').status_code == 200
+        assert user_client.get('/api/v1/users/me/').status_code == 401
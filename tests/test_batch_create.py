@@ -0,0 +1,137 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Genre, Review, Title
+
+
+def post_batch(client, url, items):
+    return client.post(url, items, format='json')
+
+
+def title_item(name, genres=('genre-0', 'genre-1'), year=2000):
+    return {
+        'name': name, 'year': year, 'category': 'movie',
+        'genre': list(genres),
+    }
+
+
+@pytest.mark.django_db
+class TestBatchCreate:
+
+    def test_titles_are_created_with_genres(
+        self, admin_api_client, category, genres
+    ):
+        response = post_batch(admin_api_client, '/api/v1/titles/', [
+            title_item('Первое'), title_item('Второе', genres=('genre-2',)),
+        ])
+        assert response.status_code == 201
+        assert [item['status'] for item in response.data] == [201, 201]
+        assert response.data[1]['data']['genre'] == ['genre-2']
+        second = Title.objects.get(pk=response.data[1]['data']['id'])
+        assert list(second.genre.values_list('slug', flat=True)) == [
+            'genre-2'
+        ]
+        assert admin_api_client.get(
+            '/api/v1/titles/?search=перв'
+        ).data['count'] == 1
+
+    def test_titles_are_indexed_once(
+        self, admin_api_client, category, genres
+    ):
+        with CaptureQueriesContext(connection) as context:
+            response = post_batch(admin_api_client, '/api/v1/titles/', [
+                title_item('Первое'), title_item('Второе'),
+            ])
+        assert response.status_code == 201
+        index_writes = [
+            query for query in context
+            if re.match(r'(UPDATE "reviews_title" SET "search_vector"'
+                        r'|DELETE FROM "reviews_titlesearchtoken")',
+                        query['sql'])
+        ]
+        # Один UPDATE на пакет или удаление токенов на каждое произведение.
+        assert len(index_writes) == (
+            1 if connection.vendor == 'postgresql' else 2
+        )
+
+    def test_invalid_items_are_reported_per_item(
+        self, admin_api_client, category, genres
+    ):
+        response = post_batch(admin_api_client, '/api/v1/titles/', [
+            title_item('Первое'),
+            title_item('Второе', genres=('missing',)),
+            title_item('Третье', year=3000),
+        ])
+        assert response.status_code == 207
+        assert [item['status'] for item in response.data] == [201, 400, 400]
+        assert 'genre' in response.data[1]['errors']
+        assert 'year' in response.data[2]['errors']
+        assert Title.objects.count() == 1
+
+    def test_slugs_are_resolved_once_per_batch(
+        self, admin_api_client, category, genres
+    ):
+        url = '/api/v1/titles/'
+        post_batch(admin_api_client, url, [title_item('Прогрев', year=3000)])
+        counts = []
+        for size in (1, 10):
+            with CaptureQueriesContext(connection) as context:
+                response = post_batch(admin_api_client, url, [
+                    title_item(f'Будущее {i}', year=3000)
+                    for i in range(size)
+                ])
+            assert response.status_code == 400
+            counts.append(len(context))
+        assert counts[0] == counts[1]
+
+    def test_genre_slugs_must_be_unique(self, admin_api_client, genres):
+        response = post_batch(admin_api_client, '/api/v1/genres/', [
+            {'name': 'Новый', 'slug': 'new'},
+            {'name': 'Снова новый', 'slug': 'new'},
+            {'name': 'Старый', 'slug': 'genre-0'},
+        ])
+        assert response.status_code == 207
+        assert [item['status'] for item in response.data] == [201, 400, 400]
+        assert response.data[0]['data'] == {'name': 'Новый', 'slug': 'new'}
+        assert Genre.objects.filter(slug='new').count() == 1
+
+    def test_batch_size_is_limited(self, admin_api_client, settings):
+        settings.BATCH_CREATE_MAX_ITEMS = 1
+        response = post_batch(admin_api_client, '/api/v1/categories/', [
+            {'name': 'Книга', 'slug': 'book'},
+            {'name': 'Музыка', 'slug': 'music'},
+        ])
+        assert response.status_code == 400
+        assert post_batch(
+            admin_api_client, '/api/v1/categories/', []
+        ).status_code == 400
+
+    def test_admin_imports_reviews(
+        self, admin_api_client, user_client, title, user, another_user
+    ):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        user_client.post(url, {'text': 'Уже есть', 'score': 10})
+        response = post_batch(admin_api_client, url, [
+            {'author': another_user.username, 'text': 'Да', 'score': 4},
+            {'author': another_user.username, 'text': 'Ещё', 'score': 1},
+            {'author': user.username, 'text': 'Повтор', 'score': 1},
+            {'author': 'nobody', 'text': 'Кто', 'score': 1},
+        ])
+        assert response.status_code == 207
+        assert [item['status'] for item in response.data] == [
+            201, 400, 400, 400
+        ]
+        assert response.data[0]['data']['author'] == another_user.username
+        assert Review.objects.filter(title=title).count() == 2
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum) == (2, 14)
+
+    def test_only_admin_imports_reviews(self, user_client, title, user):
+        response = post_batch(
+            user_client, f'/api/v1/titles/{title.id}/reviews/',
+            [{'author': user.username, 'text': 'Да', 'score': 4}],
+        )
+        assert response.status_code == 403
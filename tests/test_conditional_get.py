@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    def test_title_detail_not_modified(self, client, user_client, title):
+        url = f'/api/v1/titles/{title.id}/'
+        response = client.get(url)
+        etag = response['ETag']
+        # Категория и жанры не меняют дату изменения произведения.
+        assert not response.has_header('Last-Modified')
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert len(context) == 1
+
+        user_client.post(f'{url}reviews/', {'text': 'Да', 'score': 9})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    # Версии повышаются после COMMIT, нужна настоящая транзакция.
+    @pytest.mark.django_db(transaction=True)
+    def test_title_detail_tracks_category(self, client, title):
+        url = f'/api/v1/titles/{title.id}/'
+        etag = client.get(url)['ETag']
+        title.category.name = 'Фильмы'
+        title.category.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.data['category']['name'] == 'Фильмы'
+
+    def test_title_list_validators_skip_database(self, client, title):
+        etag = client.get('/api/v1/titles/')['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert len(context) == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_reviews_list_tracks_edits(self, client, user_client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review = user_client.post(url, {'text': 'Да', 'score': 9}).data
+        etag = client.get(url)['ETag']
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert client.get(
+            url, {'page_size': 1}, HTTP_IF_NONE_MATCH=etag
+        ).status_code == 200
+
+        user_client.patch(f'{url}{review["id"]}/', {'text': 'Нет'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.data['results'][0]['text'] == 'Нет'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_lists_track_deletes(self, client, user_client, title):
+        reviews = f'/api/v1/titles/{title.id}/reviews/'
+        review = user_client.post(reviews, {'text': 'Да', 'score': 9}).data
+        comments = f'{reviews}{review["id"]}/comments/'
+        comment = user_client.post(comments, {'text': 'Ага'}).data
+        response = client.get(comments)
+        assert not response.has_header('Last-Modified')
+        etag = response['ETag']
+        user_client.delete(f'{comments}{comment["id"]}/')
+        response = client.get(comments, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.data['results'] == []
+
+        etag = client.get(reviews)['ETag']
+        user_client.delete(f'{reviews}{review["id"]}/')
+        response = client.get(reviews, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.data['results'] == []
+
+    def test_review_detail_has_last_modified(self, client, user_client,
+                                             title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review = user_client.post(url, {'text': 'Да', 'score': 9}).data
+        response = client.get(f'{url}{review["id"]}/')
+        response = client.get(
+            f'{url}{review["id"]}/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        assert response.status_code == 304
@@ -0,0 +1,129 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.confirmation import BaseCodeStore, CacheCodeStore, make_code
+from reviews.models import OutboxEmail
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+
+
+class FixedCodeStore(BaseCodeStore):
+
+    def issue(self, user):
+        return '12345678'
+
+    def consume(self, user, code):
+        return code == '12345678'
+
+
+class TestCodes:
+
+    def test_codes_use_every_digit_freely(self):
+        codes = {make_code() for _ in range(200)}
+        assert all(len(code) == 8 and code.isdigit() for code in codes)
+        # random.sample не повторял цифр; secrets.choice повторяет.
+        assert any(len(set(code)) < len(code) for code in codes)
+
+    def test_store_must_implement_both_methods(self):
+        class IssueOnly(BaseCodeStore):
+            def issue(self, user):
+                return '1'
+
+        with pytest.raises(TypeError):
+            IssueOnly()
+
+
+def signup(client, username='newbie'):
+    response = client.post(SIGNUP_URL, {
+        'username': username, 'email': f'{username}@yamdb.fake'
+    })
+    assert response.status_code == 200
+    body = OutboxEmail.objects.order_by('-pk').values_list(
+        'body', flat=True
+    )[0]
+    return re.search(r'(\d+)$', body).group(1)
+
+
+def get_token(client, code, username='newbie'):
+    return client.post(
+        TOKEN_URL, {'username': username, 'confirmation_code': code}
+    )
+
+
+def user_writes(context):
+    return [
+        query['sql'] for query in context
+        if re.match(r'(UPDATE|INSERT)\b.*reviews_user\b', query['sql'])
+    ]
+
+
+@pytest.mark.django_db
+class TestConfirmationCodes:
+
+    def test_code_is_single_use(self, client):
+        code = signup(client)
+        response = get_token(client, code)
+        assert response.status_code == 200
+        assert 'token' in response.json()
+        assert get_token(client, code).status_code == 400
+
+    def test_new_code_replaces_old(self, client):
+        old = signup(client)
+        new = signup(client)
+        assert get_token(client, old).status_code == 400
+        # Неверный код сжёг и выданный.
+        assert get_token(client, new).status_code == 400
+        assert get_token(client, signup(client)).status_code == 200
+
+    def test_wrong_code_burns_issued_code(self, client):
+        code = signup(client)
+        assert get_token(client, code[::-1]).status_code == 400
+        assert get_token(client, code).status_code == 400
+
+    def test_login_does_not_write_user(self, client):
+        with CaptureQueriesContext(connection) as context:
+            signup(client)
+        assert len(user_writes(context)) == 1
+        with CaptureQueriesContext(connection) as context:
+            code = signup(client)
+            assert get_token(client, code).status_code == 200
+        assert user_writes(context) == []
+
+    def test_expired_code(self, client, settings):
+        settings.CONFIRMATION_CODE_TTL = -1
+        code = signup(client)
+        assert get_token(client, code).status_code == 400
+
+    def test_store_is_pluggable(self, client, settings):
+        settings.CONFIRMATION_CODE_STORE = (
+            'tests.test_confirmation_codes.FixedCodeStore'
+        )
+        assert signup(client) == '12345678'
+        assert get_token(client, '12345678').status_code == 200
+
+    def test_attempt_racing_signup_keeps_new_code(self, user, monkeypatch):
+        store = CacheCodeStore()
+        store.issue(user)
+        cache = store.cache
+        new_codes = []
+
+        class RacingCache:
+            """Новый signup успевает между чтением кода и его проверкой."""
+
+            def __getattr__(self, name):
+                return getattr(cache, name)
+
+            def get(self, key):
+                issued = cache.get(key)
+                if not new_codes:
+                    new_codes.append(store.issue(user))
+                return issued
+
+        monkeypatch.setattr(CacheCodeStore, 'cache', RacingCache())
+        assert not store.consume(user, 'wrong')
+        monkeypatch.undo()
+        assert store.consume(user, new_codes[0])
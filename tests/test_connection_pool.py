@@ -0,0 +1,120 @@
+import threading
+
+import psycopg2
+import pytest
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+)
+
+from api_yamdb.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql):
+        if self.connection.broken:
+            raise psycopg2.OperationalError('server closed the connection')
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.status = TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+def make_pool(**kwargs):
+    options = {
+        'size': 2, 'timeout': 1, 'max_lifetime': 3600,
+        'check_interval': 0, 'health_checks': True,
+    }
+    options.update(kwargs)
+    return ConnectionPool(**options)
+
+
+class TestConnectionPool:
+
+    def test_connection_is_reused(self):
+        pool = make_pool()
+        connection = pool.checkout(FakeConnection)
+        pool.checkin(connection)
+        assert pool.checkout(FakeConnection) is connection
+        stats = pool.get_stats()
+        assert (stats['created'], stats['checkouts'], stats['in_use']) == (
+            1, 2, 1
+        )
+
+    def test_pool_is_bounded(self):
+        pool = make_pool(size=1, timeout=0.05)
+        pool.checkout(FakeConnection)
+        with pytest.raises(PoolTimeout):
+            pool.checkout(FakeConnection)
+        assert pool.get_stats()['timeouts'] == 1
+
+    def test_waiter_gets_released_connection(self):
+        pool = make_pool(size=1)
+        connection = pool.checkout(FakeConnection)
+        timer = threading.Timer(0.05, pool.checkin, (connection,))
+        timer.start()
+        assert pool.checkout(FakeConnection) is connection
+        timer.join()
+        stats = pool.get_stats()
+        assert stats['waits'] == 1
+        assert stats['wait_seconds'] > 0
+
+    def test_broken_connection_is_replaced(self):
+        pool = make_pool()
+        connection = pool.checkout(FakeConnection)
+        pool.checkin(connection)
+        connection.broken = True
+        fresh = pool.checkout(FakeConnection)
+        assert fresh is not connection
+        assert connection.closed
+        stats = pool.get_stats()
+        assert (stats['discarded'], stats['open']) == (1, 1)
+
+    def test_recent_connection_is_not_pinged(self):
+        pool = make_pool(check_interval=60)
+        connection = pool.checkout(FakeConnection)
+        pool.checkin(connection)
+        connection.broken = True
+        assert pool.checkout(FakeConnection) is connection
+
+    def test_open_transaction_is_rolled_back(self):
+        pool = make_pool()
+        connection = pool.checkout(FakeConnection)
+        connection.status = TRANSACTION_STATUS_INTRANS
+        pool.checkin(connection)
+        assert connection.rollbacks == 1
+        assert pool.get_stats()['idle'] == 1
+
+    def test_unusable_connection_frees_its_slot(self):
+        pool = make_pool(size=1, timeout=0.05)
+        connection = pool.checkout(FakeConnection)
+        pool.checkin(connection, reusable=False)
+        assert connection.closed
+        assert pool.checkout(FakeConnection) is not connection
@@ -0,0 +1,57 @@
+import io
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.fastjson import FastJSONParser, FastJSONRenderer
+from api.management.commands.jsonbench import make_pages
+
+
+class TestFastJSON:
+
+    @pytest.mark.parametrize('page', ('titles', 'reviews', 'comments'))
+    def test_pages_render_like_drf(self, page):
+        data = make_pages(5)[page]
+        body = FastJSONRenderer().render(data)
+        assert body == JSONRenderer().render(data)
+        assert FastJSONParser().parse(io.BytesIO(body)) == (
+            JSONParser().parse(io.BytesIO(body))
+        )
+
+    def test_special_values_render_like_drf(self):
+        data = {
+            'decimal': Decimal('7.5'),
+            'date': timezone.now(),
+            'lazy': gettext_lazy('Отзыв'),
+            'separators': 'a\u2028b\u2029c',
+            1: None,
+            'big': 2 ** 70,
+        }
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_indent_and_empty_body(self):
+        context = {'indent': 4}
+        assert FastJSONRenderer().render({'a': 1}, None, context) == (
+            JSONRenderer().render({'a': 1}, None, context)
+        )
+        assert FastJSONRenderer().render(None) == b''
+
+    def test_malformed_body_is_parse_error(self):
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"text": '))
+
+
+@pytest.mark.django_db
+def test_api_uses_fast_json(user_client, title):
+    response = user_client.post(
+        f'/api/v1/titles/{title.pk}/reviews/',
+        data='{"text": "Отзыв", "score": 8}',
+        content_type='application/json',
+    )
+    assert response.status_code == 201
+    assert isinstance(response.accepted_renderer, FastJSONRenderer)
@@ -0,0 +1,103 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.fragments import get_stats
+from reviews.models import Review
+
+
+def get_titles(client, url='/api/v1/titles/'):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.json()['results'], [query['sql'] for query in context]
+
+
+def genre_queries(queries):
+    return [sql for sql in queries if 'reviews_title_genre' in sql]
+
+
+@pytest.mark.django_db
+class TestFragmentCache:
+
+    def test_page_is_built_from_fragments(self, client, make_titles):
+        make_titles(3)
+        first, queries = get_titles(client)
+        assert len(genre_queries(queries)) == 1
+        # Другой адрес - мимо кэша ответов, но те же фрагменты.
+        second, queries = get_titles(client, '/api/v1/titles/?page=1')
+        assert second == first
+        assert genre_queries(queries) == []
+        assert get_stats() == {'hits': 3, 'misses': 3, 'hit_ratio': 0.5}
+
+    # Версии повышаются после COMMIT, нужна настоящая транзакция.
+    @pytest.mark.django_db(transaction=True)
+    def test_only_changed_title_is_rendered(
+        self, client, user_client, make_titles
+    ):
+        titles = make_titles(3)
+        get_titles(client)
+        response = user_client.post(
+            f'/api/v1/titles/{titles[1].pk}/reviews/',
+            {'text': 'Да', 'score': 4},
+        )
+        assert response.status_code == 201
+        results, _ = get_titles(client)
+        assert [title['rating'] for title in results] == [None, 4, None]
+        assert get_stats()['misses'] == 4
+
+    @pytest.mark.django_db(transaction=True)
+    def test_genre_changes_refresh_fragments(
+        self, client, make_titles, genres
+    ):
+        title, = make_titles(1)
+        get_titles(client)
+        title.genre.remove(genres[0])
+        results, _ = get_titles(client, '/api/v1/titles/?page=1')
+        assert [genre['slug'] for genre in results[0]['genre']] == [
+            'genre-1', 'genre-2'
+        ]
+        genres[1].titles.clear()
+        results, _ = get_titles(client, '/api/v1/titles/?page_size=5')
+        assert [genre['slug'] for genre in results[0]['genre']] == [
+            'genre-2'
+        ]
+        genres[2].name = 'Драма'
+        genres[2].save()
+        results, _ = get_titles(client, '/api/v1/titles/?page_size=6')
+        assert results[0]['genre'] == [{'name': 'Драма', 'slug': 'genre-2'}]
+
+    def test_genre_change_touches_title_once(self, make_titles, genres):
+        title, = make_titles(1)
+        for change in (
+            lambda: title.genre.remove(genres[0]),
+            lambda: genres[1].titles.clear(),
+        ):
+            with CaptureQueriesContext(connection) as context:
+                change()
+            assert len([
+                query for query in context
+                if query['sql'].startswith('UPDATE "reviews_title"')
+            ]) == 1
+
+    def test_category_change_does_not_touch_titles(self, make_titles):
+        titles = make_titles(3)
+        category = titles[0].category
+        with CaptureQueriesContext(connection) as context:
+            category.name = 'Фильмы'
+            category.save()
+        assert not any(
+            query['sql'].startswith('UPDATE "reviews_title"')
+            for query in context
+        )
+
+    def test_sparse_requests_bypass_fragments(self, client, make_titles):
+        make_titles(2)
+        get_titles(client, '/api/v1/titles/?fields=id')
+        assert get_stats()['hits'] == get_stats()['misses'] == 0
+
+    def test_stats_endpoint(self, client, admin_api_client, make_titles):
+        make_titles(1)
+        get_titles(client)
+        response = admin_api_client.get('/api/v1/cache-stats/')
+        assert response.data['fragments']['misses'] == 1
@@ -0,0 +1,123 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from api.management.commands import loadtest
+from api.management.commands.loadtest import Command, Scenarios, summarize
+from reviews.models import Review, Title
+
+
+def make_command():
+    return Command(stdout=StringIO(), stderr=StringIO())
+
+
+class TestLoadtestHelpers:
+
+    def test_parse_mix(self):
+        assert make_command().parse_mix('browse=3,comments=1.5') == {
+            'browse': 3.0, 'comments': 1.5
+        }
+        for mix in ('browse', 'search=1', 'browse=1,review'):
+            with pytest.raises(CommandError):
+                make_command().parse_mix(mix)
+
+    def test_summarize(self):
+        samples = [(i / 1000, i % 10 != 0) for i in range(1, 101)]
+        summary = summarize(samples, duration=2)
+        assert summary['requests'] == 100
+        assert summary['errors'] == 10
+        assert summary['error_rate'] == 0.1
+        assert summary['throughput'] == 50
+        assert summary['p50_ms'] == pytest.approx(51)
+        assert summary['p99_ms'] == pytest.approx(100)
+        assert summary['max_ms'] == pytest.approx(100)
+        assert summarize([(0.25, True)], 1)['p99_ms'] == 250
+
+    def test_compare(self, tmp_path):
+        previous = tmp_path / 'before.json'
+        previous.write_text(json.dumps({
+            'meta': {'commit': 'abc123', 'started': '2024-01-01T00:00:00'},
+            'routes': {'GET titles-list': {
+                'throughput': 100.0, 'p99_ms': 20.0
+            }},
+        }))
+        command = make_command()
+        command.compare({'routes': {
+            'GET titles-list': {'throughput': 150.0, 'p99_ms': 12.5},
+            'GET comments-list': {'throughput': 10.0, 'p99_ms': 5.0},
+        }}, str(previous))
+        out = command.stdout.getvalue()
+        assert 'Сравнение с abc123' in out
+        assert 'rps 100.0 -> 150.0, p99 20.0 -> 12.5 мс' in out
+        assert 'comments-list' not in out
+
+    def test_empty_pools_are_dropped_from_mix(self):
+        command = make_command()
+        scenarios = Scenarios([1], [], ['token'])
+        assert command.runnable_mix(
+            {'browse': 1, 'comments': 1}, scenarios.available()
+        ) == {'browse': 1}
+        assert 'comments' in command.stderr.getvalue()
+        with pytest.raises(CommandError):
+            command.runnable_mix({'comments': 1}, set())
+
+    def test_failing_scenario_keeps_worker_running(self, monkeypatch):
+        calls = []
+
+        def browse(self, client, worker):
+            calls.append(worker)
+            raise ValueError('неожиданный ответ')
+
+        monkeypatch.setattr(Scenarios, 'browse', browse)
+        duration, samples = make_command().run(
+            Scenarios([1], [], ['token']), {'browse': 1},
+            'http://127.0.0.1:1', concurrency=2, duration=0.05,
+        )
+        assert len(calls) > 2
+        assert len(samples['scenario browse']) == len(calls)
+        assert not any(ok for _, ok in samples['scenario browse'])
+
+
+@pytest.mark.django_db
+class TestLoadtestPrepare:
+
+    def test_prepare_seeds_once(self):
+        scenarios = make_command().prepare(titles=3, concurrency=2)
+        assert len(scenarios.title_ids) == 3
+        assert len(scenarios.reviews) == 3 * loadtest.REVIEWS_PER_TITLE
+        assert len(scenarios.tokens) == 2
+        assert scenarios.available() == {'browse', 'review', 'comments'}
+        title = Title.objects.get(pk=scenarios.title_ids[0])
+        assert title.review_count == loadtest.REVIEWS_PER_TITLE
+        reviews = Review.objects.count()
+        make_command().prepare(titles=3, concurrency=2)
+        assert Review.objects.count() == reviews
+
+    def test_prepare_without_titles(self):
+        scenarios = make_command().prepare(titles=0, concurrency=1)
+        assert scenarios.available() == set()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_against_live_server(live_server, tmp_path):
+    # Тестовая SQLite в памяти блокирует таблицу при параллельной записи,
+    # поэтому пишущий сценарий идёт в один поток, а чтение - в несколько.
+    output = tmp_path / 'run.json'
+    out = StringIO()
+    call_command(
+        'loadtest', '--base-url', live_server.url, '--duration', '0.5',
+        '--concurrency', '1', '--titles', '2', '--output', str(output),
+        stdout=out,
+    )
+    result = json.loads(output.read_text())
+    assert result['total']['requests'] > 0
+    assert 'GET titles-list' in result['routes']
+    assert result['routes']['GET titles-list']['errors'] == 0
+    call_command(
+        'loadtest', '--base-url', live_server.url, '--duration', '0.2',
+        '--concurrency', '2', '--titles', '2', '--mix', 'browse=1',
+        '--compare', str(output), stdout=out,
+    )
+    assert 'Сравнение с' in out.getvalue()
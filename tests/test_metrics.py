@@ -0,0 +1,52 @@
+import pytest
+
+from api.metrics import registry
+from reviews.outbox import enqueue_email
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    registry.clear()
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_request_is_recorded_per_view(self, client, title):
+        assert client.get('/api/v1/titles/').status_code == 200
+        body = client.get('/metrics').content.decode()
+        labels = 'view="api:titles-list",method="GET"'
+        assert f'yamdb_http_requests_total{{{labels},status="200"}} 1' in body
+        assert (
+            f'yamdb_http_request_duration_seconds_count{{{labels}}} 1' in body
+        )
+        assert f'yamdb_db_queries_per_request_bucket{{{labels},le="0"}} 0' in (
+            body
+        )
+        assert f'yamdb_http_response_size_bytes_count{{{labels}}} 1' in body
+
+    def test_query_count_matches_database(
+        self, client, title, django_assert_num_queries
+    ):
+        url = f'/api/v1/titles/{title.pk}/'
+        with django_assert_num_queries(3):
+            client.get(url)
+        total, count = registry.queries.series[
+            ('api:titles-detail', 'GET')
+        ][1:]
+        assert (total, count) == (3, 1)
+
+    def test_exports_outbox_gauges_and_cache_counters(self, client):
+        body = client.get('/metrics').content.decode()
+        assert 'yamdb_outbox_queue_depth 0' in body
+        assert '# TYPE yamdb_response_cache_misses_total counter' in body
+        assert 'yamdb_fragment_cache_hits_total 0' in body
+
+    def test_outbox_metrics_are_cached(
+        self, client, django_assert_num_queries
+    ):
+        client.get('/metrics')
+        enqueue_email('Тема', 'Текст', 'reader@yamdb.fake')
+        with django_assert_num_queries(0):
+            body = client.get('/metrics').content.decode()
+        assert 'yamdb_outbox_queue_depth 0' in body
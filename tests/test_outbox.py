@@ -0,0 +1,109 @@
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+
+from reviews.models import OutboxEmail, User
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def signup(self, client):
+        return client.post('/api/v1/auth/signup/', {
+            'username': 'newbie', 'email': 'newbie@yamdb.fake'
+        })
+
+    def test_signup_only_queues_email(self, client):
+        assert self.signup(client).status_code == 200
+        assert mail.outbox == []
+        email = OutboxEmail.objects.get()
+        assert email.to == 'newbie@yamdb.fake'
+        assert email.sent is None
+
+    def test_signup_without_email_creates_no_user(self, client,
+                                                   monkeypatch):
+        def enqueue_email(**kwargs):
+            raise RuntimeError('очередь недоступна')
+
+        monkeypatch.setattr('api.views.enqueue_email', enqueue_email)
+        with pytest.raises(RuntimeError):
+            self.signup(client)
+        assert not User.objects.filter(username='newbie').exists()
+
+    def test_send_outbox_delivers_once(self, client):
+        self.signup(client)
+        call_command('send_outbox')
+        call_command('send_outbox')
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['newbie@yamdb.fake']
+        assert OutboxEmail.objects.get().sent is not None
+
+    def test_failed_delivery_is_retried_later(self, client, settings):
+        self.signup(client)
+        settings.EMAIL_BACKEND = 'tests.test_outbox.BrokenBackend'
+        call_command('send_outbox')
+        email = OutboxEmail.objects.get()
+        assert email.attempts == 1
+        assert email.sent is None
+        assert email.next_attempt > email.created
+        assert 'SMTP недоступен' in email.last_error
+
+    def test_one_session_per_batch(self, client, settings):
+        settings.EMAIL_BACKEND = 'tests.test_outbox.SessionBackend'
+        SessionBackend.sessions = []
+        for name in ('first', 'second', 'third'):
+            client.post('/api/v1/auth/signup/', {
+                'username': name, 'email': f'{name}@yamdb.fake'
+            })
+        call_command('send_outbox')
+        assert SessionBackend.sessions == [3]
+
+    def test_session_is_reopened_after_failure(self, client, settings):
+        settings.EMAIL_BACKEND = 'tests.test_outbox.SessionBackend'
+        SessionBackend.sessions = []
+        for name in ('first', 'broken', 'third'):
+            client.post('/api/v1/auth/signup/', {
+                'username': name, 'email': f'{name}@yamdb.fake'
+            })
+        call_command('send_outbox')
+        assert SessionBackend.sessions == [1, 1]
+        assert OutboxEmail.objects.filter(sent__isnull=True).count() == 1
+
+    def test_finished_emails_are_purged(self, client, settings):
+        self.signup(client)
+        call_command('send_outbox')
+        assert OutboxEmail.objects.count() == 1
+        settings.OUTBOX_RETENTION = -1
+        call_command('send_outbox')
+        assert not OutboxEmail.objects.exists()
+
+
+class BrokenBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+class SessionBackend(EmailBackend):
+    """Считает письма, отправленные за каждую открытую сессию."""
+    sessions = []
+
+    def open(self):
+        if getattr(self, 'session', None) is None:
+            self.session = 0
+            return True
+        return False
+
+    def close(self):
+        if getattr(self, 'session', None) is not None:
+            self.sessions.append(self.session)
+        self.session = None
+
+    def send_messages(self, messages):
+        if self.session is None:
+            raise AssertionError('Письмо отправлено без открытой сессии')
+        if any('broken' in message.to[0] for message in messages):
+            raise ConnectionError('SMTP оборвал сессию')
+        self.session += len(messages)
+        return len(messages)
@@ -0,0 +1,56 @@
+import pytest
+
+from reviews.models import Review
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def collect(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            assert 'count' not in response.data
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_titles_cursor_walks_every_title(self, client, make_titles):
+        titles = make_titles(7)
+        ids = self.collect(
+            client, '/api/v1/titles/?pagination=cursor&page_size=3'
+        )
+        assert ids == [title.id for title in sorted(
+            titles, key=lambda title: (title.name, title.id)
+        )]
+
+    def test_reviews_cursor_walks_every_review(
+        self, client, title, django_user_model
+    ):
+        for i in range(7):
+            Review.objects.create(
+                title=title,
+                author=django_user_model.objects.create(
+                    username=f'author{i}', email=f'author{i}@yamdb.fake'
+                ),
+                text='Текст',
+                score=5,
+            )
+        ids = self.collect(
+            client,
+            f'/api/v1/titles/{title.id}/reviews/?pagination=cursor&page_size=2'
+        )
+        assert ids == list(
+            title.reviews.order_by('-pub_date', 'id').values_list(
+                'id', flat=True
+            )
+        )
+
+    def test_page_number_stays_default(self, client, make_titles):
+        make_titles(7)
+        response = client.get('/api/v1/titles/?page_size=500')
+        assert response.data['count'] == 7
+        assert len(response.data['results']) == 7
+        response = client.get('/api/v1/titles/')
+        assert len(response.data['results']) == 5
@@ -0,0 +1,142 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.utils import timezone
+
+from reviews import rankings
+from reviews.models import Category, Review, Title, TitleRanking
+from reviews.rankings import rebuild_rankings
+from reviews.ratings import review_created, review_deleted
+
+
+@pytest.fixture
+def reviewers(django_user_model):
+    return [
+        django_user_model.objects.create(
+            username=f'reviewer{i}', email=f'reviewer{i}@yamdb.fake'
+        )
+        for i in range(8)
+    ]
+
+
+def add_reviews(title, reviewers, *scores):
+    reviews = []
+    for author, score in zip(reviewers, scores):
+        review = Review.objects.create(
+            title=title, author=author, text='Отзыв', score=score
+        )
+        review_created(review)
+        reviews.append(review)
+    return reviews
+
+
+def snapshot():
+    return {
+        row.title_id: (row.weighted_rating, row.trend)
+        for row in TitleRanking.objects.all()
+    }
+
+
+def assert_same(incremental, rebuilt):
+    assert incremental.keys() == rebuilt.keys()
+    for pk, (weighted, trend) in rebuilt.items():
+        assert incremental[pk][0] == pytest.approx(weighted)
+        assert incremental[pk][1] == pytest.approx(trend)
+
+
+@pytest.mark.django_db
+class TestRankings:
+
+    def test_top_uses_weighted_rating(
+        self, client, settings, make_titles, reviewers
+    ):
+        settings.RANKING_PRIOR_WEIGHT = 5
+        one_great, many_good, poor, _ = make_titles(4)
+        add_reviews(one_great, reviewers, 10)
+        add_reviews(many_good, reviewers, *[9] * 8)
+        add_reviews(poor, reviewers, 2, 2, 2)
+        rebuild_rankings()
+        results = client.get('/api/v1/titles/top/').json()['results']
+        assert [title['id'] for title in results] == [
+            many_good.pk, one_great.pk, poor.pk
+        ]
+        mean = (10 + 72 + 6) / 12
+        assert results[1]['weighted_rating'] == pytest.approx(
+            (5 * mean + 10) / 6
+        )
+        assert results[1]['genre'][0]['slug'] == 'genre-0'
+
+    def test_top_by_category_and_genre(
+        self, client, make_titles, reviewers, genres
+    ):
+        first, second = make_titles(2)
+        second.category = Category.objects.create(name='Книга', slug='book')
+        second.save()
+        second.genre.set(genres[2:])
+        add_reviews(first, reviewers, 5)
+        add_reviews(second, reviewers, 7)
+        response = client.get('/api/v1/titles/top/?category=movie')
+        assert [t['id'] for t in response.json()['results']] == [first.pk]
+        response = client.get('/api/v1/titles/top/?genre=genre-0')
+        assert [t['id'] for t in response.json()['results']] == [first.pk]
+        response = client.get('/api/v1/titles/top/?genre=genre-2')
+        assert len(response.json()['results']) == 2
+
+    def test_trending_counts_recent_reviews(
+        self, client, make_titles, reviewers
+    ):
+        old, fresh = make_titles(2)
+        add_reviews(old, reviewers, *[8] * 6)
+        Review.objects.filter(title=old).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+        add_reviews(fresh, reviewers, 6, 6)
+        rebuild_rankings()
+        results = client.get('/api/v1/titles/trending/').json()['results']
+        assert [title['id'] for title in results] == [fresh.pk]
+        assert results[0]['recent_reviews'] == pytest.approx(2, abs=0.01)
+
+    def test_incremental_updates_match_rebuild(self, make_titles, reviewers):
+        first, second = make_titles(2)
+        add_reviews(first, reviewers, 3, 8, 10)
+        reviews = add_reviews(second, reviewers, 4, 9)
+        incremental = snapshot()
+        rebuild_rankings(Title.objects.all())
+        assert_same(incremental, snapshot())
+
+        reviews[0].delete()
+        review_deleted(reviews[0])
+        incremental = snapshot()
+        rebuild_rankings(Title.objects.all())
+        assert_same(incremental, snapshot())
+
+        reviews[1].delete()
+        review_deleted(reviews[1])
+        assert set(snapshot()) == {first.pk}
+
+    def test_rebuild_command(self, make_titles, reviewers):
+        title, = make_titles(1)
+        Review.objects.create(
+            title=title, author=reviewers[0], text='Загружен', score=6
+        )
+        call_command('reconcile_ratings')
+        TitleRanking.objects.all().delete()
+        call_command('rebuild_rankings')
+        assert TitleRanking.objects.get().weighted_rating == 6
+
+    def test_concurrent_first_review_is_not_duplicate(
+        self, monkeypatch, title, user_client
+    ):
+        def lose_race(titles):
+            # Строку рейтингов параллельно вставил другой запрос.
+            raise IntegrityError('duplicate key value')
+
+        monkeypatch.setattr(rankings, 'rebuild_rankings', lose_race)
+        response = user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/', {'text': 'Да', 'score': 7}
+        )
+        assert response.status_code == 201
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum) == (1, 7)
@@ -0,0 +1,80 @@
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.cache import bump_version
+from api_yamdb.db.router import (
+    ReplicaMiddleware, ReplicaRouter, may_read_stale
+)
+from reviews.models import Title, User
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica_0']
+    settings.DB_REPLICA_STICKY_SECONDS = 60
+    return settings
+
+
+def routed(method, user=None, status=200, model=Title, probe=None):
+    """База, в которую роутер направил бы чтение во время запроса."""
+    seen = []
+
+    def view(request):
+        seen.append(probe() if probe else ReplicaRouter().db_for_read(model))
+        return HttpResponse(status=status)
+
+    headers = {}
+    if user is not None:
+        headers['HTTP_AUTHORIZATION'] = f'Bearer {AccessToken.for_user(user)}'
+    request = getattr(RequestFactory(), method.lower())('/api/v1/titles/',
+                                                        **headers)
+    ReplicaMiddleware(view)(request)
+    return seen[0]
+
+
+@pytest.mark.django_db
+class TestReplicaRouter:
+
+    def test_safe_requests_read_from_replica(self, replicas, user):
+        assert routed('GET') == 'replica_0'
+        assert routed('GET', user) == 'replica_0'
+        assert routed('POST', user) == 'default'
+
+    def test_reads_stick_to_primary_after_write(
+        self, replicas, user, another_user
+    ):
+        routed('POST', user)
+        assert routed('GET', user) == 'default'
+        assert routed('GET', another_user) == 'replica_0'
+
+    def test_failed_write_does_not_stick(self, replicas, user):
+        routed('POST', user, status=400)
+        assert routed('GET', user) == 'replica_0'
+
+    def test_stickiness_expires(self, replicas, user):
+        replicas.DB_REPLICA_STICKY_SECONDS = 0
+        routed('POST', user)
+        assert routed('GET', user) == 'replica_0'
+
+    def test_outside_request_reads_default(self):
+        router = ReplicaRouter()
+        assert router.db_for_read(Title) is None
+        assert router.db_for_write(Title) == 'default'
+        assert not router.allow_migrate('replica_0', 'reviews')
+
+    def test_users_are_read_from_primary(self, replicas):
+        assert routed('GET', model=User) == 'default'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_replica_reads_are_not_cached_after_write(self, replicas, user):
+        assert routed('GET', probe=may_read_stale) is False
+        bump_version(Title)
+        assert routed('GET', probe=may_read_stale) is True
+        # С основной базы - можно кэшировать.
+        routed('POST', user)
+        assert routed('GET', user, probe=may_read_stale) is False
+        replicas.DB_REPLICA_STICKY_SECONDS = 0
+        bump_version(Title)
+        assert routed('GET', probe=may_read_stale) is False
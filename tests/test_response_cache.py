@@ -0,0 +1,69 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import get_version
+from reviews.models import Genre, Review, Title
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_repeated_list_is_served_from_cache(self, client, title):
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'MISS'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'HIT'
+        # ETag списка собирается из версий в кэше, база не нужна.
+        assert len(context) == 0
+        assert response.data['results'][0]['name'] == title.name
+        other_page = client.get('/api/v1/titles/', {'page_size': 1})
+        assert other_page['X-Cache'] == 'MISS'
+
+    def test_forged_host_does_not_poison_links(self, client, make_titles):
+        make_titles(2)
+        url = '/api/v1/titles/?page_size=1'
+        forged = client.get(url, HTTP_HOST='evil.example')
+        assert forged.data['next'].startswith('http://evil.example/')
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['next'].startswith('http://testserver/')
+        assert client.get(url, secure=True)['X-Cache'] == 'MISS'
+
+    # Версии повышаются после COMMIT, нужна настоящая транзакция.
+    @pytest.mark.django_db(transaction=True)
+    def test_writes_invalidate_entries(self, client, title, user):
+        url = f'/api/v1/titles/{title.id}/'
+        client.get(url)
+        Review.objects.create(title=title, author=user, text='Да', score=8)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+
+        Genre.objects.filter(slug='genre-0').get().delete()
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert [genre['slug'] for genre in response.data['genre']] == [
+            'genre-1'
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_version_is_bumped_after_commit(self, client, title, user):
+        url = f'/api/v1/titles/{title.id}/'
+        version = get_version(Title)
+        with transaction.atomic():
+            Review.objects.create(
+                title=title, author=user, text='Да', score=8
+            )
+            # Чтение до фиксации не должно попасть под новую версию.
+            assert get_version(Title) == version
+            client.get(url)
+        assert get_version(Title) != version
+        assert client.get(url)['X-Cache'] == 'MISS'
+
+    def test_stats(self, client, admin_api_client, user_client, genres):
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        assert user_client.get('/api/v1/cache-stats/').status_code == 403
+        response = admin_api_client.get('/api/v1/cache-stats/')
+        assert response.data['hits'] == 1
+        assert response.data['misses'] == 1
@@ -0,0 +1,77 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review
+
+
+def count_queries(client, method, url, data=None):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data)
+    return response, len(context)
+
+
+@pytest.mark.django_db
+class TestReviewQueries:
+
+    def test_create_review_loads_title_once(
+        self, title, user_client, another_user_client
+    ):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        # Первый отзыв строит строки рейтингов и счётчика оценки 10.
+        another_user_client.post(url, {'text': 'Нет', 'score': 10})
+        # Первый запрос загружает пользователя в кэш аутентификации.
+        user_client.get(url)
+        response, queries = count_queries(
+            user_client, 'post', url, {'text': 'Да', 'score': 10}
+        )
+        assert response.status_code == 201
+        # Точка сохранения, произведение, точка сохранения вставки,
+        # вставка, её выход, счётчики, счётчик оценки, рейтинги, выход.
+        assert queries == 9
+
+    def test_duplicate_review_is_rejected(self, title, user_client):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        user_client.post(url, {'text': 'Да', 'score': 10})
+        response = user_client.post(url, {'text': 'Ещё', 'score': 1})
+        assert response.status_code == 400
+        assert response.data == {
+            'non_field_errors': ['Можно оставить только один отзыв!']
+        }
+        assert Review.objects.count() == 1
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum) == (1, 10)
+
+    def test_comments_are_scoped_by_title(
+        self, title, make_titles, user, user_client
+    ):
+        other_title, = make_titles(1)
+        review = Review.objects.create(
+            title=title, author=user, text='Да', score=5
+        )
+        comment = Comment.objects.create(
+            review=review, author=user, text='Комментарий'
+        )
+        wrong = f'/api/v1/titles/{other_title.id}/reviews/{review.id}/comments/'
+        assert user_client.get(wrong).status_code == 404
+        assert user_client.post(wrong, {'text': 'Нет'}).status_code == 404
+        assert user_client.get(f'{wrong}{comment.id}/').status_code == 404
+        assert user_client.delete(f'{wrong}{comment.id}/').status_code == 404
+        assert Comment.objects.count() == 1
+
+    def test_comment_delete_query_count(self, title, user, user_client):
+        review = Review.objects.create(
+            title=title, author=user, text='Да', score=5
+        )
+        comment = Comment.objects.create(
+            review=review, author=user, text='Комментарий'
+        )
+        url = (
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            f'{comment.id}/'
+        )
+        user_client.get(url)
+        response, queries = count_queries(user_client, 'delete', url)
+        assert response.status_code == 204
+        # Комментарий с автором одним запросом по title_id и review_id.
+        assert queries == 2
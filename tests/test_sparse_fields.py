@@ -0,0 +1,95 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review
+
+
+def get_with_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.json(), [query['sql'] for query in context]
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+
+    def test_title_fields_skip_joins_and_columns(self, client, make_titles):
+        make_titles(3)
+        _, full = get_with_queries(client, '/api/v1/titles/')
+        data, queries = get_with_queries(
+            client, '/api/v1/titles/?fields=id,name,year'
+        )
+        assert [set(item) for item in data['results']] == (
+            [{'id', 'name', 'year'}] * 3
+        )
+        assert len(queries) == len(full) - 1
+        select = queries[-1]
+        assert 'JOIN' not in select
+        assert 'description' not in select
+        assert 'rating' not in select
+
+    def test_title_default_and_collapsed_relations(self, client, title):
+        url = f'/api/v1/titles/{title.pk}/'
+        assert client.get(url).json()['category'] == {
+            'name': 'Фильм', 'slug': 'movie'
+        }
+        data = client.get(f'{url}?expand=&fields=id,genre,category').json()
+        assert data == {
+            'id': title.pk, 'genre': ['genre-0', 'genre-1'],
+            'category': 'movie',
+        }
+
+    def test_cursor_page_with_sparse_fields(self, client, make_titles):
+        make_titles(7)
+        data, queries = get_with_queries(
+            client, '/api/v1/titles/?pagination=cursor&fields=year'
+        )
+        assert len(data['results']) == 5
+        assert data['next']
+        # Без COUNT и без агрегата для ETag - только страница.
+        assert len(queries) == 1
+
+    def test_review_expand(self, client, title, user):
+        review = Review.objects.create(
+            title=title, author=user, text='Да', score=9
+        )
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        data, queries = get_with_queries(
+            client, f'{url}?fields=id,author,title&expand=author,title'
+        )
+        assert data['results'] == [{
+            'id': review.pk,
+            'author': {
+                'username': user.username,
+                'first_name': user.first_name,
+                'last_name': user.last_name,
+            },
+            'title': {'id': title.pk, 'name': title.name, 'year': 1994},
+        }]
+        # Произведение, COUNT, отзывы с автором.
+        assert len(queries) == 3
+        data = client.get(f'{url}{review.pk}/?expand=title').json()
+        assert data['title']['name'] == title.name
+        assert data['author'] == user.username
+
+    def test_comment_fields(self, client, title, user):
+        review = Review.objects.create(
+            title=title, author=user, text='Да', score=9
+        )
+        Comment.objects.create(review=review, author=user, text='Нет')
+        data, queries = get_with_queries(
+            client,
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+            '?fields=text',
+        )
+        assert data['results'] == [{'text': 'Нет'}]
+        assert 'JOIN' not in queries[-1]
+
+    def test_unknown_names_are_rejected(self, client, title):
+        response = client.get(
+            '/api/v1/titles/?fields=id,secret&expand=reviews'
+        )
+        assert response.status_code == 400
+        assert set(response.json()) == {'fields', 'expand'}
@@ -0,0 +1,84 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.throttling import TokenBucketThrottle
+from reviews.models import User
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {
+                'signup': None, 'signup_identity': None,
+                'token': None, 'token_identity': None,
+                **rates,
+            },
+        }
+    return set_rates
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(TokenBucketThrottle, 'timer', lambda self: now[0])
+    return now
+
+
+def signup(client, name, ip='10.0.0.1'):
+    return client.post(
+        SIGNUP_URL,
+        {'username': name, 'email': f'{name}@yamdb.fake'},
+        REMOTE_ADDR=ip,
+    )
+
+
+@pytest.mark.django_db
+class TestAuthThrottling:
+
+    def test_ip_bucket_refills(self, client, rates, clock):
+        rates(signup='2/m')
+        assert signup(client, 'first').status_code == 200
+        assert signup(client, 'second').status_code == 200
+        response = signup(client, 'third')
+        assert response.status_code == 429
+        assert response['Retry-After'] == '30'
+        assert signup(client, 'fourth', ip='10.0.0.2').status_code == 200
+        clock[0] += 30
+        assert signup(client, 'third').status_code == 200
+        assert signup(client, 'fifth').status_code == 429
+
+    def test_identity_bucket_spans_addresses(self, client, rates, clock):
+        rates(signup_identity='1/h')
+        assert signup(client, 'newbie').status_code == 200
+        response = client.post(
+            SIGNUP_URL,
+            {'username': 'other', 'email': 'NEWBIE@yamdb.fake'},
+            REMOTE_ADDR='10.0.0.9',
+        )
+        assert response.status_code == 429
+        assert signup(client, 'other', ip='10.0.0.9').status_code == 200
+
+    def test_rejection_skips_database(self, client, rates, clock):
+        rates(token='1/m')
+        User.objects.create(username='newbie', email='newbie@yamdb.fake')
+        data = {'username': 'newbie', 'confirmation_code': '000'}
+        client.post(TOKEN_URL, data)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(TOKEN_URL, data)
+        assert response.status_code == 429
+        assert len(context) == 0
+
+    def test_token_identity_bucket(self, client, rates, clock):
+        rates(token_identity='2/m')
+        data = {'username': 'nobody', 'confirmation_code': '000'}
+        assert client.post(TOKEN_URL, data).status_code == 404
+        assert client.post(TOKEN_URL, data).status_code == 404
+        assert client.post(TOKEN_URL, data).status_code == 429
+        data['username'] = 'somebody'
+        assert client.post(TOKEN_URL, data).status_code == 404
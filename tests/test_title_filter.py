@@ -0,0 +1,39 @@
+import pytest
+
+from reviews.models import Title
+
+
+@pytest.mark.django_db
+class TestTitleFilter:
+
+    @pytest.fixture
+    def titles(self, category, genres):
+        drama, comedy, horror = genres
+        both = Title.objects.create(name='Оба', year=1990, category=category)
+        both.genre.set((drama, comedy))
+        only_drama = Title.objects.create(
+            name='Драма', year=2000, category=category
+        )
+        only_drama.genre.set((drama,))
+        scary = Title.objects.create(name='Ужасы', year=2010)
+        scary.genre.set((horror,))
+        return both, only_drama, scary
+
+    def names(self, client, **params):
+        response = client.get('/api/v1/titles/', params)
+        assert response.status_code == 200
+        return [title['name'] for title in response.data['results']]
+
+    def test_any_genre_without_duplicates(self, client, titles):
+        assert self.names(client, genre='genre-0,genre-1') == ['Драма', 'Оба']
+
+    def test_all_genres(self, client, titles):
+        assert self.names(client, genre_all='genre-0,genre-1') == ['Оба']
+
+    def test_year_range_and_exact_slug(self, client, titles):
+        assert self.names(client, year_min=1995, year_max=2010) == [
+            'Драма', 'Ужасы'
+        ]
+        assert self.names(client, year=2000) == ['Драма']
+        assert self.names(client, category='movie') == ['Драма', 'Оба']
+        assert self.names(client, category='mov') == []
@@ -0,0 +1,31 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context)
+
+
+@pytest.mark.django_db
+class TestTitleQueries:
+
+    # Версии повышаются после COMMIT, нужна настоящая транзакция.
+    @pytest.mark.django_db(transaction=True)
+    def test_list_query_count_does_not_grow(self, client, make_titles):
+        make_titles(1)
+        one_title = count_queries(client, '/api/v1/titles/')
+        make_titles(4)
+        full_page = count_queries(client, '/api/v1/titles/')
+        assert one_title == full_page, (
+            'Количество запросов к БД растёт вместе с числом произведений '
+            'на странице'
+        )
+
+    def test_retrieve_query_count(self, client, make_titles):
+        title, = make_titles(1)
+        # Дата изменения для ETag, произведение с категорией и жанры.
+        assert count_queries(client, f'/api/v1/titles/{title.id}/') == 3
@@ -0,0 +1,78 @@
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Review, Title
+from reviews.ratings import (
+    rating_drift, rebuild_score_counts, reconcile_ratings
+)
+
+
+def reviews_url(title):
+    return f'/api/v1/titles/{title.id}/reviews/'
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_rating_follows_reviews(
+        self, title, user_client, another_user_client
+    ):
+        user_client.post(reviews_url(title), {'text': 'Да', 'score': 10})
+        response = another_user_client.post(
+            reviews_url(title), {'text': 'Нет', 'score': 5}
+        )
+        assert response.status_code == 201
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum) == (2, 15)
+        assert title.rating == 7.5
+
+        review_url = f'{reviews_url(title)}{response.data["id"]}/'
+        another_user_client.patch(review_url, {'score': 1})
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum) == (2, 11)
+        assert title.rating == 5.5
+
+        another_user_client.delete(review_url)
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum) == (1, 10)
+        assert title.rating == 10
+
+        response = user_client.get(f'/api/v1/titles/{title.id}/')
+        assert response.data['rating'] == 10
+
+    def test_title_without_reviews_has_no_rating(self, title, user_client):
+        response = user_client.get(f'/api/v1/titles/{title.id}/')
+        assert response.data['rating'] is None
+
+    def test_reconcile_fixes_drift(self, title, user):
+        Review.objects.create(title=title, author=user, text='Да', score=8)
+        Title.objects.filter(pk=title.pk).update(
+            review_count=5, score_sum=1, rating=0.2
+        )
+
+        call_command('reconcile_ratings')
+
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum) == (1, 8)
+        assert title.rating == 8
+
+    def test_reconcile_fixes_stale_rating(self, title, user):
+        Review.objects.create(title=title, author=user, text='Да', score=8)
+        Title.objects.filter(pk=title.pk).update(
+            review_count=1, score_sum=8, rating=3
+        )
+        rebuild_score_counts([title.pk])
+        assert list(rating_drift()) == [title]
+
+        call_command('reconcile_ratings')
+
+        title.refresh_from_db()
+        assert title.rating == 8
+        assert not rating_drift().exists()
+
+    def test_rating_without_reviews_is_drift(self, title):
+        Title.objects.filter(pk=title.pk).update(rating=5)
+        assert list(rating_drift()) == [title]
+        reconcile_ratings()
+        title.refresh_from_db()
+        assert title.rating is None
@@ -0,0 +1,44 @@
+import pytest
+
+from reviews.models import Title
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    @pytest.fixture
+    def titles(self, category):
+        return [
+            Title.objects.create(
+                name='Побег из Шоушенка', year=1994, category=category,
+                description='Тюремная драма',
+            ),
+            Title.objects.create(
+                name='Побег из Алькатраса', year=1979, category=category,
+            ),
+            Title.objects.create(
+                name='Зелёная миля', year=1999, category=category,
+                description='Ещё один фильм про побег',
+            ),
+        ]
+
+    def search(self, client, text):
+        response = client.get('/api/v1/titles/', {'search': text})
+        assert response.status_code == 200
+        return [title['name'] for title in response.data['results']]
+
+    def test_all_terms_match_by_prefix(self, client, titles):
+        assert self.search(client, 'побе шоу') == ['Побег из Шоушенка']
+
+    def test_name_ranks_above_description(self, client, titles):
+        assert self.search(client, 'побег') == [
+            'Побег из Алькатраса', 'Побег из Шоушенка', 'Зелёная миля',
+        ]
+
+    def test_index_follows_title_changes(self, client, titles):
+        title = titles[2]
+        title.name = 'Зелёная книга'
+        title.description = ''
+        title.save()
+        assert self.search(client, 'миля') == []
+        assert self.search(client, 'книг') == ['Зелёная книга']
@@ -0,0 +1,88 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, TitleScoreCount
+from reviews.ratings import rating_drift
+
+
+def distribution(client, title):
+    response = client.get(f'/api/v1/titles/{title.pk}/stats/')
+    assert response.status_code == 200
+    data = response.json()
+    return data, {
+        row['score']: row['count'] for row in data['scores'] if row['count']
+    }
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    def test_counts_follow_review_changes(
+        self, client, title, user_client, another_user_client
+    ):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        review = user_client.post(url, {'text': 'Да', 'score': 8}).json()
+        another_user_client.post(url, {'text': 'Нет', 'score': 3})
+        data, counts = distribution(client, title)
+        assert counts == {3: 1, 8: 1}
+        assert data['review_count'] == 2
+        assert data['rating'] == pytest.approx(5.5)
+        assert [row['score'] for row in data['scores']] == list(range(1, 11))
+
+        user_client.patch(f'{url}{review["id"]}/', {'score': 3})
+        assert distribution(client, title)[1] == {3: 2}
+        user_client.delete(f'{url}{review["id"]}/')
+        data, counts = distribution(client, title)
+        assert counts == {3: 1}
+        assert data['review_count'] == 1
+
+    def test_batch_create_updates_counts(
+        self, client, title, admin_api_client, user, another_user
+    ):
+        response = admin_api_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            [
+                {'text': 'Да', 'score': 7, 'author': user.username},
+                {'text': 'Нет', 'score': 7, 'author': another_user.username},
+            ],
+            format='json',
+        )
+        assert response.status_code == 201
+        assert distribution(client, title)[1] == {7: 2}
+
+    def test_stats_read_counters_only(self, client, title, user_client):
+        user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/', {'text': 'Да', 'score': 9}
+        )
+        with CaptureQueriesContext(connection) as context:
+            distribution(client, title)
+        assert not any('reviews_review' in q['sql'] for q in context)
+
+    def test_reconcile_rebuilds_counts(self, client, title, user):
+        Review.objects.create(title=title, author=user, text='Да', score=4)
+        assert distribution(client, title)[1] == {}
+        call_command('reconcile_ratings')
+        assert TitleScoreCount.objects.get().count == 1
+        assert distribution(client, title)[1] == {4: 1}
+
+    def test_reconcile_fixes_score_counts(
+        self, client, title, user_client, another_user_client
+    ):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        user_client.post(url, {'text': 'Да', 'score': 8})
+        another_user_client.post(url, {'text': 'Нет', 'score': 3})
+        assert not rating_drift().exists()
+        TitleScoreCount.objects.filter(score=8).update(count=5)
+        TitleScoreCount.objects.filter(score=3).delete()
+        TitleScoreCount.objects.create(title=title, score=1, count=0)
+        assert list(rating_drift()) == [title]
+
+        call_command('reconcile_ratings')
+
+        assert distribution(client, title)[1] == {3: 1, 8: 1}
+        assert not rating_drift().exists()
+
+    def test_missing_title(self, client):
+        assert client.get('/api/v1/titles/0/stats/').status_code == 404
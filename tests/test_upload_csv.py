@@ -0,0 +1,71 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews.models import (
+    Category, Comment, Genre, Review, Title, TitleRanking, TitleScoreCount,
+    User
+)
+
+
+# Загрузка и очистка - отдельные транзакции, как при запуске команды:
+# PostgreSQL не выполняет TRUNCATE при отложенных проверках ключей.
+@pytest.mark.django_db(transaction=True)
+class TestUploadCsv:
+
+    def test_truncate_populated_database(self, django_user_model):
+        admin = django_user_model.objects.create_superuser(
+            username='boss', email='boss@yamdb.fake', password='secret'
+        )
+        call_command('upload_csv_files', '--bulk')
+        titles = Title.objects.count()
+        reviews = Review.objects.count()
+        assert titles and reviews
+        assert TitleRanking.objects.exists()
+        assert TitleScoreCount.objects.exists()
+
+        call_command('upload_csv_files', '--bulk', '--truncate')
+        assert Title.objects.count() == titles
+        assert Review.objects.count() == reviews
+        assert User.objects.filter(pk=admin.pk).exists()
+
+    def test_rerun_reports_skipped_rows(self):
+        call_command('upload_csv_files', '--bulk')
+        out = StringIO()
+        call_command('upload_csv_files', '--bulk', stdout=out)
+        line, = [
+            line for line in out.getvalue().splitlines()
+            if line.startswith('titles.csv:')
+        ]
+        titles = Title.objects.count()
+        assert f'обработано {titles} строк' in line
+        assert line.endswith(f'добавлено 0, пропущено {titles}')
+
+    def test_bulk_loads_every_row(self):
+        out = StringIO()
+        call_command('upload_csv_files', '--bulk', '--batch-size', 7,
+                     stdout=out)
+        counts = {
+            User: 5, Category: 3, Genre: 15, Title: 32, Review: 72,
+            Comment: 3, Title.genre.through: 42,
+        }
+        for model, count in counts.items():
+            assert model.objects.count() == count
+        assert 'review.csv: обработано 72 строк' in out.getvalue()
+        title = Title.objects.get(pk=1)
+        assert title.review_count == title.reviews.count()
+
+    def test_truncate_keeps_real_accounts(self, django_user_model):
+        admin = django_user_model.objects.create(
+            username='editor', email='editor@yamdb.fake', role='admin'
+        )
+        call_command('upload_csv_files', '--bulk')
+        call_command('upload_csv_files', '--bulk', '--truncate')
+        assert User.objects.filter(pk=admin.pk).exists()
+        assert User.objects.count() == 6
+
+    def test_conflicting_row_fails_loudly(self):
+        Category.objects.create(name='Кино', slug='movie')
+        with pytest.raises(CommandError, match='category.csv'):
+            call_command('upload_csv_files', '--bulk')